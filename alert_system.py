@@ -11,8 +11,8 @@ from config import *
 class AlertSystem:
     """Manages visual and audio alerts for collision warnings"""
     
-    def __init__(self):
-        self.alert_sound_enabled = ALERT_SOUND_ENABLED
+    def __init__(self, sound_enabled=ALERT_SOUND_ENABLED):
+        self.alert_sound_enabled = sound_enabled
         self.alert_active = False
         self.current_severity = 'none'
         
@@ -0,0 +1,133 @@
+"""
+Struct-of-arrays constant-velocity Kalman filter running predict/update for all tracks at once
+"""
+
+import numpy as np
+
+
+class BatchKalmanFilter:
+    """
+    Kalman filters of many tracks stored as rows of shared arrays
+
+    State per row: [x, y, vx, vy] with covariance P (4x4); the model matrices
+    F, H, Q and R are shared by all rows. Rows are kept dense: removing a row
+    moves the last row into its place, so a track's row index can change on removal.
+    """
+
+    def __init__(self, capacity=64, initial_covariance=1000.0, measurement_noise=5.0,
+                 process_noise=0.03):
+        """
+        Initialize the filter bank
+
+        Args:
+            capacity: Initial number of rows allocated (grows as needed)
+            initial_covariance: Diagonal of P for a new track
+            measurement_noise: Diagonal of R
+            process_noise: Diagonal of Q
+        """
+        # State transition (constant velocity, dt = 1 frame)
+        self.F = np.array([[1, 0, 1, 0],
+                           [0, 1, 0, 1],
+                           [0, 0, 1, 0],
+                           [0, 0, 0, 1]], dtype=np.float64)
+        # Measurement function (center position is observed)
+        self.H = np.array([[1, 0, 0, 0],
+                           [0, 1, 0, 0]], dtype=np.float64)
+        self.R = np.eye(2) * measurement_noise
+        self.Q = np.eye(4) * process_noise
+        self.initial_covariance = initial_covariance
+
+        self.x = np.zeros((capacity, 4))
+        self.P = np.zeros((capacity, 4, 4))
+        self.predict_counts = np.zeros(capacity, dtype=np.int64)  # Predict steps since add()
+        self.count = 0
+
+    def _grow(self):
+        capacity = max(1, len(self.x)) * 2
+        x = np.zeros((capacity, 4))
+        P = np.zeros((capacity, 4, 4))
+        predict_counts = np.zeros(capacity, dtype=np.int64)
+        x[:self.count] = self.x[:self.count]
+        P[:self.count] = self.P[:self.count]
+        predict_counts[:self.count] = self.predict_counts[:self.count]
+        self.x, self.P, self.predict_counts = x, P, predict_counts
+
+    def add(self, cx, cy):
+        """
+        Add a track at rest at (cx, cy)
+
+        Returns:
+            Row index of the new track
+        """
+        if self.count == len(self.x):
+            self._grow()
+        row = self.count
+        self.x[row] = (cx, cy, 0.0, 0.0)
+        self.P[row] = np.eye(4) * self.initial_covariance
+        self.predict_counts[row] = 0
+        self.count += 1
+        return row
+
+    def remove(self, row):
+        """
+        Remove a track, compacting the arrays by moving the last row into its place
+
+        Returns:
+            Former index of the row moved into `row`, or None if the last row was removed
+        """
+        last = self.count - 1
+        self.count -= 1
+        if row == last:
+            return None
+        self.x[row] = self.x[last]
+        self.P[row] = self.P[last]
+        self.predict_counts[row] = self.predict_counts[last]
+        return last
+
+    def predict(self, rows=None):
+        """
+        Predict one frame ahead for the given rows (all rows if None)
+
+        Args:
+            rows: Row indices (array or list), or None
+        """
+        if rows is None:
+            rows = slice(0, self.count)
+        elif len(rows) == 0:
+            return
+        # x = F x ; P = F P F^T + Q, for every row in one batched operation
+        self.x[rows] = self.x[rows] @ self.F.T
+        self.P[rows] = self.F @ self.P[rows] @ self.F.T + self.Q
+        self.predict_counts[rows] += 1
+
+    def update(self, rows, measurements):
+        """
+        Correct the given rows with measured centers
+
+        Args:
+            rows: Row indices
+            measurements: (len(rows), 2) array of measured (cx, cy)
+        """
+        if len(rows) == 0:
+            return
+        rows = np.asarray(rows)
+        z = np.asarray(measurements, dtype=np.float64).reshape(-1, 2)
+        x = self.x[rows]
+        P = self.P[rows]
+        PHt = P @ self.H.T
+
+        # Innovation and its covariance
+        y = z - x @ self.H.T
+        S = self.H @ PHt + self.R
+        K = PHt @ np.linalg.inv(S)
+
+        self.x[rows] = x + (K @ y[:, :, None])[:, :, 0]
+        # Joseph form, numerically stable like filterpy's update
+        I_KH = np.eye(4) - K @ self.H
+        self.P[rows] = I_KH @ P @ I_KH.transpose(0, 2, 1) + K @ self.R @ K.transpose(0, 2, 1)
+
+    def positions(self, rows=None):
+        """Get the (N, 2) centers of the given rows (all rows if None)"""
+        if rows is None:
+            return self.x[:self.count, :2]
+        return self.x[rows, :2]
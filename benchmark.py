@@ -0,0 +1,444 @@
+"""
+Performance benchmarks for the Vehicle Collision Detection System
+"""
+
+import argparse
+import os
+import sys
+import time
+import cv2
+import numpy as np
+from config import *
+
+
+def sample_frames(video_path, count=50, stride=5):
+    """
+    Sample frames from a video file
+
+    Args:
+        video_path: Path to the video
+        count: Number of frames to sample
+        stride: Take every stride-th frame
+
+    Returns:
+        List of frames
+    """
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise ValueError(f"Could not open video file: {video_path}")
+
+    frames = []
+    index = 0
+    while len(frames) < count:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        if index % stride == 0:
+            frames.append(frame)
+        index += 1
+    cap.release()
+
+    if not frames:
+        raise ValueError(f"No frames could be read from: {video_path}")
+    print(f"Sampled {len(frames)} frames from {video_path}")
+    return frames
+
+
+def _print_header(title):
+    print("=" * 60)
+    print(title)
+    print("=" * 60)
+
+
+def benchmark_class_filter(args):
+    """Compare inference with and without the vehicle class filter pushed into the model"""
+    from ultralytics import YOLO
+    from detection_decoder import decode_result
+
+    _print_header("Class filter benchmark")
+    frames = sample_frames(args.video, args.frames, args.stride)
+    model = YOLO(args.model)
+
+    # Warm up
+    model(frames[0], conf=CONFIDENCE_THRESHOLD, iou=IOU_THRESHOLD, verbose=False)
+
+    results = {}
+    for label, classes in [('all classes', None), ('vehicle classes', VEHICLE_CLASSES)]:
+        totals = {'preprocess': 0.0, 'inference': 0.0, 'postprocess': 0.0, 'decode': 0.0}
+        boxes_in = 0
+        vehicles = 0
+        start = time.perf_counter()
+        for frame in frames:
+            result = model(frame, conf=CONFIDENCE_THRESHOLD, iou=IOU_THRESHOLD,
+                           classes=classes, verbose=False)[0]
+            decode_start = time.perf_counter()
+            detections = decode_result(result, VEHICLE_CLASSES)
+            totals['decode'] += (time.perf_counter() - decode_start) * 1000
+            for key in ('preprocess', 'inference', 'postprocess'):
+                totals[key] += result.speed[key]
+            boxes_in += len(result.boxes) if result.boxes is not None else 0
+            vehicles += len(detections)
+        elapsed = (time.perf_counter() - start) * 1000 / len(frames)
+        results[label] = elapsed
+
+        print(f"\n{label}:")
+        print(f"  Total per frame:  {elapsed:.2f} ms")
+        for key, value in totals.items():
+            print(f"  {key.capitalize():<12} {value / len(frames):.2f} ms")
+        print(f"  Boxes returned:   {boxes_in / len(frames):.1f} per frame")
+        print(f"  Vehicles kept:    {vehicles / len(frames):.1f} per frame")
+
+    saving = results['all classes'] - results['vehicle classes']
+    print(f"\nSaving per frame: {saving:.2f} ms "
+          f"({saving / results['all classes'] * 100:.1f}%)")
+
+
+def _box_iou(a, b):
+    """Pairwise IoU between two (N, 4) and (M, 4) xywh arrays"""
+    a_x2, a_y2 = a[:, 0] + a[:, 2], a[:, 1] + a[:, 3]
+    b_x2, b_y2 = b[:, 0] + b[:, 2], b[:, 1] + b[:, 3]
+    iw = np.clip(np.minimum(a_x2[:, None], b_x2[None]) - np.maximum(a[:, 0][:, None], b[:, 0][None]), 0, None)
+    ih = np.clip(np.minimum(a_y2[:, None], b_y2[None]) - np.maximum(a[:, 1][:, None], b[:, 1][None]), 0, None)
+    inter = iw * ih
+    union = (a[:, 2] * a[:, 3])[:, None] + (b[:, 2] * b[:, 3])[None] - inter
+    return inter / np.maximum(union, 1e-9)
+
+
+def _match_detections(reference, candidate, iou_threshold=0.5):
+    """
+    Greedily match candidate detections to reference detections of the same class
+
+    Returns:
+        (matched_count, list of IoUs of matched pairs, list of confidence differences)
+    """
+    if len(reference) == 0 or len(candidate) == 0:
+        return 0, [], []
+
+    ious = _box_iou(reference[:, :4], candidate[:, :4])
+    ious[reference[:, 5][:, None] != candidate[:, 5][None]] = 0.0
+
+    matched_ious = []
+    conf_diffs = []
+    while True:
+        i, j = np.unravel_index(np.argmax(ious), ious.shape)
+        if ious[i, j] < iou_threshold:
+            break
+        matched_ious.append(float(ious[i, j]))
+        conf_diffs.append(abs(float(reference[i, 4] - candidate[j, 4])))
+        ious[i, :] = 0.0
+        ious[:, j] = 0.0
+    return len(matched_ious), matched_ious, conf_diffs
+
+
+def compare_detectors(reference, candidate, frames, iou_threshold=0.5):
+    """
+    Compare a candidate detector against a reference detector on the same frames
+
+    Returns:
+        Dict with recall, precision, mean IoU, mean confidence difference and latencies (ms)
+    """
+    # Warm up both backends
+    reference.detect(frames[0])
+    candidate.detect(frames[0])
+
+    ref_total = cand_total = matched_total = 0
+    all_ious = []
+    all_conf_diffs = []
+    ref_time = cand_time = 0.0
+    for frame in frames:
+        start = time.perf_counter()
+        ref_dets = reference.detect(frame)
+        ref_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        cand_dets = candidate.detect(frame)
+        cand_time += time.perf_counter() - start
+
+        matched, ious, conf_diffs = _match_detections(ref_dets, cand_dets, iou_threshold)
+        ref_total += len(ref_dets)
+        cand_total += len(cand_dets)
+        matched_total += matched
+        all_ious.extend(ious)
+        all_conf_diffs.extend(conf_diffs)
+
+    return {
+        'recall': matched_total / ref_total if ref_total else 1.0,
+        'precision': matched_total / cand_total if cand_total else 1.0,
+        'mean_iou': float(np.mean(all_ious)) if all_ious else 0.0,
+        'mean_conf_diff': float(np.mean(all_conf_diffs)) if all_conf_diffs else 0.0,
+        'reference_ms': ref_time * 1000 / len(frames),
+        'candidate_ms': cand_time * 1000 / len(frames),
+    }
+
+
+def print_comparison(stats, reference_label, candidate_label):
+    print(f"  Recall vs {reference_label}:    {stats['recall'] * 100:.1f}%")
+    print(f"  Precision vs {reference_label}: {stats['precision'] * 100:.1f}%")
+    print(f"  Mean IoU of matches:     {stats['mean_iou']:.3f}")
+    print(f"  Mean conf difference:    {stats['mean_conf_diff']:.3f}")
+    print(f"  {reference_label} latency: {stats['reference_ms']:.2f} ms/frame")
+    print(f"  {candidate_label} latency: {stats['candidate_ms']:.2f} ms/frame")
+
+
+def benchmark_onnx_parity(args):
+    """Check that the ONNX backend reproduces the PyTorch detections"""
+    from vehicle_detector import TorchDetector, OnnxDetector, export_onnx_model
+
+    _print_header("ONNX backend parity")
+    frames = sample_frames(args.video, args.frames, args.stride)
+
+    onnx_path = args.onnx
+    if not os.path.isfile(onnx_path):
+        print(f"Exporting {args.model} to ONNX...")
+        onnx_path = export_onnx_model(args.model)
+
+    stats = compare_detectors(TorchDetector(args.model), OnnxDetector(onnx_path), frames)
+    print_comparison(stats, 'pytorch', 'onnx')
+
+    passed = stats['recall'] >= args.min_match and stats['precision'] >= args.min_match
+    print(f"\nParity {'PASSED' if passed else 'FAILED'} (minimum match rate: {args.min_match * 100:.0f}%)")
+    return 0 if passed else 1
+
+
+def random_tracked_vehicles(count, frame_size=(1280, 720), seed=0):
+    """
+    Synthetic VehicleTracker output, with values snapped to thresholds so band edges are hit
+
+    Returns:
+        List of tracked vehicle dicts (id, position, velocity, speed, bbox)
+    """
+    rng = np.random.default_rng(seed)
+    width, height = frame_size
+    vehicles = []
+    for i in range(count):
+        w, h = rng.integers(1, 400, size=2)
+        x, y = rng.integers(-50, width), rng.integers(-50, height)
+        speed = float(rng.choice([0.0, LOW_SPEED, MEDIUM_SPEED, HIGH_SPEED, CRITICAL_SPEED,
+                                  rng.uniform(0, 40)]))
+        vehicles.append({
+            'id': i,
+            'position': (float(x + w / 2), float(y + h / 2)),
+            'velocity': (float(rng.normal(0, 10)), float(rng.normal(0, 10))),
+            'speed': speed,
+            'bbox': (int(x), int(y), int(w), int(h)) if i % 10 else None
+        })
+    return vehicles
+
+
+def benchmark_collision_batch(args):
+    """Check the batch collision analysis against the per-vehicle path and time both"""
+    from collision_detector import CollisionDetector
+
+    _print_header("Batch collision analysis")
+    width, height = 1280, 720
+    mismatches = 0
+
+    for view in ['front', 'back', 'left', 'right']:
+        detector = CollisionDetector(width, height)
+        vehicles = random_tracked_vehicles(args.vehicles, (width, height), seed=len(view))
+        batch = detector.analyze_tracked_vehicles(vehicles, view)
+
+        for vehicle, batch_info in zip(vehicles, batch):
+            bbox = vehicle['bbox']
+            if bbox is None:
+                x, y = vehicle['position']
+                bbox = (int(x - 50), int(y - 50), 100, 100)
+            scalar_info = detector.analyze_vehicle(bbox, vehicle, view)
+            for key, value in scalar_info.items():
+                other = batch_info[key]
+                same = (value == other if isinstance(value, (str, bool, int, tuple))
+                        else np.isclose(value, other, rtol=1e-9, atol=1e-9) or value == other)
+                if not same:
+                    mismatches += 1
+                    if mismatches <= 10:
+                        print(f"  Mismatch [{view}] vehicle {vehicle['id']} {key}: "
+                              f"scalar {value}, batch {other}")
+        print(f"  {view}: {len(vehicles)} vehicles compared")
+
+    print("\nVehicles  per-vehicle (ms)  batch (ms)  speedup")
+    detector = CollisionDetector(width, height)
+    for count in [1, 10, 50, 200, 1000]:
+        vehicles = random_tracked_vehicles(count, (width, height))
+        bboxes = [v['bbox'] or (int(v['position'][0] - 50), int(v['position'][1] - 50), 100, 100)
+                  for v in vehicles]
+
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            for bbox, vehicle in zip(bboxes, vehicles):
+                detector.analyze_vehicle(bbox, vehicle, 'front')
+        scalar_ms = (time.perf_counter() - start) * 1000 / args.repeat
+
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            detector.analyze_tracked_vehicles(vehicles, 'front')
+        batch_ms = (time.perf_counter() - start) * 1000 / args.repeat
+        print(f"{count:8d}  {scalar_ms:17.3f}  {batch_ms:10.3f}  {scalar_ms / batch_ms:6.1f}x")
+
+    print(f"\nEquivalence {'PASSED' if mismatches == 0 else f'FAILED ({mismatches} mismatches)'}")
+    return 0 if mismatches == 0 else 1
+
+
+def _greedy_assignment(cost_matrix, max_distance):
+    """Reference: the greedy matching VehicleTracker used before the optimal assignment"""
+    matched = []
+    unmatched_dets = list(range(len(cost_matrix)))
+    unmatched_trks = list(range(len(cost_matrix[0]) if cost_matrix else 0))
+    while True:
+        min_cost, min_det, min_trk = float('inf'), -1, -1
+        for det_idx in unmatched_dets:
+            for trk_idx in unmatched_trks:
+                if cost_matrix[det_idx][trk_idx] < min_cost:
+                    min_cost, min_det, min_trk = cost_matrix[det_idx][trk_idx], det_idx, trk_idx
+        if min_cost < max_distance and min_det != -1:
+            matched.append((min_det, min_trk))
+            unmatched_dets.remove(min_det)
+            unmatched_trks.remove(min_trk)
+        else:
+            break
+    return matched
+
+
+def synthetic_scene(count, frame_size=(1920, 1080), seed=0):
+    """
+    Vehicles spread over a frame and detections of them one frame later
+
+    Returns:
+        (tracker, detections) with count tracks already established
+    """
+    from vehicle_tracker import VehicleTracker
+
+    rng = np.random.default_rng(seed)
+    width, height = frame_size
+    centers = np.column_stack([rng.uniform(0, width, count), rng.uniform(0, height, count)])
+    size = np.array([40, 30])
+    tracker = VehicleTracker()
+    tracker.update([tuple(map(int, (*(c - size / 2), *size))) for c in centers],
+                   (width / 2, height / 2))
+
+    moved = centers + rng.normal(0, 8, centers.shape)
+    detections = [tuple(map(int, (*(c - size / 2), *size))) for c in moved]
+    return tracker, detections
+
+
+def benchmark_tracker_association(args):
+    """Time detection-to-track association from 10 to 1000 vehicles"""
+    _print_header("Tracker association scaling")
+    print("Vehicles  assignment (ms)  matched  greedy (ms)  greedy matched")
+
+    for count in args.sizes:
+        tracker, detections = synthetic_scene(count)
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            matched, _, _ = tracker._associate_detections_to_trackers(detections, None, None)
+            timings.append(time.perf_counter() - start)
+        assignment_ms = min(timings) * 1000
+
+        greedy = '-'
+        if count <= args.greedy_limit:
+            predicted = tracker.kf.positions()
+            centers = np.array([tracker._center(d) for d in detections])
+            cost = np.sqrt(((centers[:, None, :] - predicted[None, :, :])**2).sum(axis=2)).tolist()
+            start = time.perf_counter()
+            greedy_matched = _greedy_assignment(cost, tracker.max_distance)
+            greedy = f"{(time.perf_counter() - start) * 1000:11.2f}  {len(greedy_matched):14d}"
+        print(f"{count:8d}  {assignment_ms:15.2f}  {len(matched):7d}  {greedy}")
+
+
+def benchmark_tracker_predict(args):
+    """Check that VehicleTracker predicts every track exactly once per frame, and time update()"""
+    _print_header("Tracker predict-once regression")
+    rng = np.random.default_rng(1)
+    failures = 0
+
+    for count in args.sizes:
+        tracker, detections = synthetic_scene(count)
+        for frame in range(args.frames):
+            counts = dict(zip(tracker.row_ids, tracker.kf.predict_counts[:tracker.kf.count].tolist()))
+            # Some vehicles are missed on some frames, so matched, unmatched and new tracks all occur
+            frame_detections = [d for d in detections if rng.random() > 0.1]
+            tracker.update(frame_detections if frame % 5 else [], (960, 540))
+
+            for row, object_id in enumerate(tracker.row_ids):
+                expected = counts.get(object_id, -1) + 1
+                actual = int(tracker.kf.predict_counts[row])
+                if actual != expected:
+                    failures += 1
+                    if failures <= 10:
+                        print(f"  {count} tracks, frame {frame}: track {object_id} "
+                              f"predicted {actual - expected + 1} times")
+        print(f"  {count} tracks: {args.frames} frames checked")
+
+    print("\nVehicles  update (ms)  predict all (ms)  per-detection predicts (ms)")
+    for count in args.sizes:
+        tracker, detections = synthetic_scene(count)
+        start = time.perf_counter()
+        for _ in range(args.frames):
+            tracker.update(detections, (960, 540))
+        update_ms = (time.perf_counter() - start) * 1000 / args.frames
+
+        start = time.perf_counter()
+        for _ in range(args.frames):
+            tracker.kf.predict()
+        predict_ms = (time.perf_counter() - start) * 1000 / args.frames
+        # Association used to predict every track once per detection, plus once more when matched
+        print(f"{count:8d}  {update_ms:11.2f}  {predict_ms:16.3f}  {(count + 1) * predict_ms:27.2f}")
+
+    print(f"\nPredict once per frame {'PASSED' if failures == 0 else f'FAILED ({failures} tracks)'}")
+    return 0 if failures == 0 else 1
+
+
+def main():
+    """Main entry point with command-line arguments"""
+    parser = argparse.ArgumentParser(description='Vehicle Collision Detection benchmarks')
+    subparsers = parser.add_subparsers(dest='benchmark', required=True)
+
+    class_filter = subparsers.add_parser('class-filter',
+                                         help='Per-frame saving of filtering classes inside the model')
+    class_filter.add_argument('--video', default='DEMO2.mp4', help='Video to sample frames from')
+    class_filter.add_argument('--model', default=MODEL_PATH, help='YOLOv8 weights')
+    class_filter.add_argument('--frames', type=int, default=50, help='Number of frames to sample')
+    class_filter.add_argument('--stride', type=int, default=5, help='Sample every N-th frame')
+    class_filter.set_defaults(func=benchmark_class_filter)
+
+    onnx_parity = subparsers.add_parser('onnx-parity',
+                                        help='Compare ONNX backend detections against the .pt model')
+    onnx_parity.add_argument('--video', default='DEMO2.mp4', help='Video to sample frames from')
+    onnx_parity.add_argument('--model', default=MODEL_PATH, help='YOLOv8 weights')
+    onnx_parity.add_argument('--onnx', default=ONNX_MODEL_PATH, help='ONNX model (exported if missing)')
+    onnx_parity.add_argument('--frames', type=int, default=30, help='Number of frames to sample')
+    onnx_parity.add_argument('--stride', type=int, default=10, help='Sample every N-th frame')
+    onnx_parity.add_argument('--min-match', type=float, default=0.9,
+                             help='Minimum recall and precision against the .pt model')
+    onnx_parity.set_defaults(func=benchmark_onnx_parity)
+
+    collision_batch = subparsers.add_parser('collision-batch',
+                                            help='Batch vs per-vehicle collision analysis (equivalence and speed)')
+    collision_batch.add_argument('--vehicles', type=int, default=5000,
+                                 help='Random vehicles compared per view')
+    collision_batch.add_argument('--repeat', type=int, default=20, help='Timing repetitions')
+    collision_batch.set_defaults(func=benchmark_collision_batch)
+
+    tracker_association = subparsers.add_parser('tracker-association',
+                                                help='Association time from 10 to 1000 detections/tracks')
+    tracker_association.add_argument('--sizes', type=int, nargs='+',
+                                     default=[10, 50, 100, 250, 500, 1000],
+                                     help='Numbers of tracks (and detections) to time')
+    tracker_association.add_argument('--repeat', type=int, default=5, help='Timing repetitions')
+    tracker_association.add_argument('--greedy-limit', type=int, default=250,
+                                     help='Largest size to also time the old greedy matching on')
+    tracker_association.set_defaults(func=benchmark_tracker_association)
+
+    tracker_predict = subparsers.add_parser('tracker-predict',
+                                            help='Check one Kalman predict per track per frame')
+    tracker_predict.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 500, 1000],
+                                 help='Numbers of tracks to check and time')
+    tracker_predict.add_argument('--frames', type=int, default=20, help='Frames per size')
+    tracker_predict.set_defaults(func=benchmark_tracker_predict)
+
+    args = parser.parse_args()
+    sys.exit(args.func(args) or 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,16 +4,45 @@ Collision detection and prediction module
 
 import numpy as np
 import math
+import config
 from config import *
 
+# Severity levels, the index is the severity code used by the batch API
+SEVERITIES = ['none', 'low', 'medium', 'high', 'critical']
+
+# Thresholds used by predict_collision (overridable per detector, e.g. for threshold sweeps)
+THRESHOLD_NAMES = [
+    'CRITICAL_DISTANCE', 'HIGH_DISTANCE', 'MEDIUM_DISTANCE', 'LOW_DISTANCE',
+    'CRITICAL_SPEED', 'HIGH_SPEED', 'MEDIUM_SPEED', 'LOW_SPEED',
+    'CRITICAL_ANGLE', 'HIGH_ANGLE', 'MEDIUM_ANGLE', 'LOW_ANGLE',
+    'SPEED_THRESHOLD'
+]
+
+
+def default_thresholds():
+    """Collision thresholds from config.py"""
+    return {name: getattr(config, name) for name in THRESHOLD_NAMES}
+
 
 class CollisionDetector:
     """Detects and predicts potential collisions"""
     
-    def __init__(self, frame_width, frame_height):
+    def __init__(self, frame_width, frame_height, thresholds=None):
+        """
+        Args:
+            frame_width: Frame width in pixels
+            frame_height: Frame height in pixels
+            thresholds: Dict overriding some of the THRESHOLD_NAMES values from config.py
+        """
         self.frame_width = frame_width
         self.frame_height = frame_height
         self.frame_center = (frame_width / 2, frame_height / 2)
+        self.thresholds = default_thresholds()
+        if thresholds:
+            unknown = set(thresholds) - set(THRESHOLD_NAMES)
+            if unknown:
+                raise ValueError(f"Unknown collision thresholds: {sorted(unknown)}")
+            self.thresholds.update(thresholds)
         
     def calculate_distance(self, bbox, view):
         """
@@ -100,6 +129,16 @@ class CollisionDetector:
         Returns:
             (is_collision, time_to_collision, severity)
         """
+        # Local names shadow the config.py constants with this detector's thresholds
+        t = self.thresholds
+        CRITICAL_DISTANCE, HIGH_DISTANCE = t['CRITICAL_DISTANCE'], t['HIGH_DISTANCE']
+        MEDIUM_DISTANCE, LOW_DISTANCE = t['MEDIUM_DISTANCE'], t['LOW_DISTANCE']
+        CRITICAL_SPEED, HIGH_SPEED = t['CRITICAL_SPEED'], t['HIGH_SPEED']
+        MEDIUM_SPEED, LOW_SPEED = t['MEDIUM_SPEED'], t['LOW_SPEED']
+        CRITICAL_ANGLE, HIGH_ANGLE = t['CRITICAL_ANGLE'], t['HIGH_ANGLE']
+        MEDIUM_ANGLE, LOW_ANGLE = t['MEDIUM_ANGLE'], t['LOW_ANGLE']
+        SPEED_THRESHOLD = t['SPEED_THRESHOLD']
+        
         position = vehicle_info['position']
         velocity = vehicle_info['velocity']
         speed = vehicle_info['speed']
@@ -231,6 +270,196 @@ class CollisionDetector:
         
         return is_collision, time_to_collision, severity
     
+    def predict_collisions(self, positions, velocities, speeds, distances, angles, view):
+        """
+        Vectorized predict_collision for many vehicles (or recorded track samples) of one view
+        
+        Args:
+            positions: (N, 2) array of vehicle centers
+            velocities: (N, 2) array of velocities
+            speeds: (N,) array of tracked speeds
+            distances: (N,) array of distances in meters
+            angles: (N,) array of angles in degrees
+            view: 'front', 'back', 'left', 'right'
+        
+        Returns:
+            (is_collision, time_to_collision, severity_codes) arrays, codes index SEVERITIES
+        """
+        result = self._predict_batch(positions, velocities, speeds, distances, angles, view)
+        return result['collision_detected'], result['time_to_collision'], result['severity']
+    
+    def _predict_batch(self, positions, velocities, speeds, distances, angles, view):
+        """Array version of predict_collision returning TTC, all risk scores and severity codes"""
+        t = self.thresholds
+        positions = np.asarray(positions, dtype=np.float64).reshape(-1, 2)
+        velocities = np.asarray(velocities, dtype=np.float64).reshape(-1, 2)
+        speeds = np.asarray(speeds, dtype=np.float64)
+        distances = np.asarray(distances, dtype=np.float64)
+        angles = np.asarray(angles, dtype=np.float64)
+        
+        vx, vy = velocities[:, 0], velocities[:, 1]
+        actual_speed = np.maximum(speeds, np.sqrt(vx**2 + vy**2))
+        
+        # Angle from the view's straight-ahead direction, normalized to 0-180
+        angle_from_center = np.abs(angles - (0 if view in ['front', 'back'] else 90))
+        angle_from_center = np.where(angle_from_center > 180, 360 - angle_from_center, angle_from_center)
+        
+        # Time to collision for vehicles moving towards the center
+        dx = positions[:, 0] - self.frame_center[0]
+        dy = positions[:, 1] - self.frame_center[1]
+        approaching = (actual_speed > t['SPEED_THRESHOLD']) & ((vx * dx + vy * dy) < 0)
+        time_to_collision = np.full(len(distances), np.inf)
+        time_to_collision[approaching] = distances[approaching] / (actual_speed[approaching] * 0.1)
+        
+        # Risk scores per factor, band lookups replace the if/elif chains
+        d, s, a = distances, actual_speed, angle_from_center
+        distance_score = self._band_scores(
+            d, [t['CRITICAL_DISTANCE'], t['HIGH_DISTANCE'], t['MEDIUM_DISTANCE'], t['LOW_DISTANCE']],
+            np.maximum(0.0, 1.0 - (d - t['LOW_DISTANCE']) / 50.0))
+        speed_score = self._band_scores(
+            s, [t['CRITICAL_SPEED'], t['HIGH_SPEED'], t['MEDIUM_SPEED'], t['LOW_SPEED']],
+            s / t['LOW_SPEED'] * 0.4, descending=True)
+        angle_score = self._band_scores(
+            a, [t['CRITICAL_ANGLE'], t['HIGH_ANGLE'], t['MEDIUM_ANGLE'], t['LOW_ANGLE']],
+            np.maximum(0.0, 1.0 - (a - t['LOW_ANGLE']) / 60.0))
+        combined_score = distance_score * 0.4 + speed_score * 0.35 + angle_score * 0.25
+        
+        # Fallback severity from the combined score: >= 0.3 low, >= 0.5 medium, >= 0.7 high
+        severity = np.searchsorted([0.3, 0.5, 0.7], combined_score, side='right').astype(np.int8)
+        
+        # Threshold combinations, applied from lowest to highest precedence of the
+        # if/elif cascade in predict_collision so the first matching rule wins
+        rules = [
+            (1, (d <= t['LOW_DISTANCE']) & (s >= t['LOW_SPEED']) & (a <= t['LOW_ANGLE'])),
+            (2, (d <= t['MEDIUM_DISTANCE']) & (s >= t['LOW_SPEED']) & (a <= t['MEDIUM_ANGLE'])),
+            (3, (d <= t['HIGH_DISTANCE']) & (s >= t['MEDIUM_SPEED']) & (a <= t['HIGH_ANGLE'])),
+            (4, (d <= t['CRITICAL_DISTANCE']) & (s >= t['LOW_SPEED']) & (a <= t['CRITICAL_ANGLE'])),
+        ]
+        for code, mask in rules:
+            severity[mask] = code
+        
+        # Very close vehicle: at least high, medium/high become critical
+        very_close = d <= t['CRITICAL_DISTANCE'] / 2
+        severity[very_close] = np.where(severity[very_close] <= 1, 3, 4)
+        # Very high speed approaching
+        severity[(s >= t['CRITICAL_SPEED']) & (d <= t['HIGH_DISTANCE']) & (a <= t['HIGH_ANGLE'])] = 4
+        
+        return {
+            'time_to_collision': time_to_collision,
+            'distance_score': distance_score,
+            'speed_score': speed_score,
+            'angle_score': angle_score,
+            'combined_score': combined_score,
+            'severity': severity,
+            'collision_detected': severity > 0
+        }
+    
+    @staticmethod
+    def _band_scores(values, thresholds, fallback, descending=False):
+        """
+        Risk score of the first threshold band a value falls in (1.0, 0.8, 0.6, 0.4), else fallback
+        
+        Bands are 'value <= threshold' checked in order, or 'value >= threshold' when descending.
+        """
+        bands = np.asarray(thresholds, dtype=np.float64)
+        if descending:
+            # value >= T  <=>  -value <= -T
+            values, bands = -values, -bands
+        # Running max keeps the edges sorted while preserving first-match semantics,
+        # even for unordered thresholds (e.g. during sweeps)
+        band = np.searchsorted(np.maximum.accumulate(bands), values, side='left')
+        scores = np.array([1.0, 0.8, 0.6, 0.4, 0.0])[band]
+        return np.where(band < len(bands), scores, fallback)
+    
+    def calculate_distances(self, bboxes):
+        """Vectorized calculate_distance for an (N, 4) array of (x, y, w, h) bboxes"""
+        pixel_height = np.asarray(bboxes, dtype=np.float64).reshape(-1, 4)[:, 3]
+        valid = pixel_height > 0
+        distances = np.full(len(pixel_height), 100.0)  # Default far distance
+        distance_pixels = (REAL_VEHICLE_WIDTH * FOCAL_LENGTH) / pixel_height[valid]
+        distances[valid] = np.clip(distance_pixels / PIXELS_PER_METER, 1.0, 200.0)
+        return distances
+    
+    def calculate_angles(self, bboxes, view):
+        """Vectorized calculate_angle for an (N, 4) array of (x, y, w, h) bboxes"""
+        bboxes = np.asarray(bboxes, dtype=np.float64).reshape(-1, 4)
+        dx = bboxes[:, 0] + bboxes[:, 2] / 2 - self.frame_center[0]
+        dy = bboxes[:, 1] + bboxes[:, 3] / 2 - self.frame_center[1]
+        angles = np.degrees(np.arctan2(dy, dx))
+        angles = np.where(angles < 0, angles + 360, angles)
+        
+        if view == 'back':
+            angles = (angles + 180) % 360
+        elif view == 'left':
+            angles = (angles + 90) % 360
+        elif view == 'right':
+            angles = (angles - 90) % 360
+        return angles
+    
+    def analyze_vehicles(self, bboxes, positions, velocities, speeds, view):
+        """
+        Batch analysis of all vehicles of a view (vectorized analyze_vehicle)
+        
+        Args:
+            bboxes: (N, 4) array of (x, y, w, h) bounding boxes
+            positions: (N, 2) array of tracked centers
+            velocities: (N, 2) array of velocities
+            speeds: (N,) array of tracked speeds
+            view: 'front', 'back', 'left', 'right'
+        
+        Returns:
+            Dict of (N,) arrays: distance, angle, time_to_collision, distance_score,
+            speed_score, angle_score, combined_score, severity (codes into SEVERITIES)
+            and collision_detected
+        """
+        distances = self.calculate_distances(bboxes)
+        angles = self.calculate_angles(bboxes, view)
+        result = self._predict_batch(positions, velocities, speeds, distances, angles, view)
+        result['distance'] = distances
+        result['angle'] = angles
+        return result
+    
+    def analyze_tracked_vehicles(self, tracked_vehicles, view):
+        """
+        Analyze the output of VehicleTracker.get_tracked_vehicles() in one batch
+        
+        Returns:
+            List of vehicle info dictionaries, as analyze_vehicle returns them
+        """
+        if not tracked_vehicles:
+            return []
+        
+        bboxes = []
+        for vehicle in tracked_vehicles:
+            bbox = vehicle.get('bbox', None)
+            if bbox is None:
+                x, y = vehicle['position']
+                bbox = (int(x - 50), int(y - 50), 100, 100)
+            bboxes.append(bbox)
+        
+        result = self.analyze_vehicles(
+            np.array(bboxes, dtype=np.float64),
+            np.array([vehicle['position'] for vehicle in tracked_vehicles], dtype=np.float64),
+            np.array([vehicle['velocity'] for vehicle in tracked_vehicles], dtype=np.float64),
+            np.array([vehicle['speed'] for vehicle in tracked_vehicles], dtype=np.float64),
+            view
+        )
+        
+        vehicles_info = []
+        for i, vehicle in enumerate(tracked_vehicles):
+            vehicles_info.append({
+                'position': vehicle['position'],
+                'velocity': vehicle['velocity'],
+                'speed': vehicle['speed'],
+                'distance': float(result['distance'][i]),
+                'angle': float(result['angle'][i]),
+                'id': vehicle['id'],
+                'collision_detected': bool(result['collision_detected'][i]),
+                'time_to_collision': float(result['time_to_collision'][i]),
+                'severity': SEVERITIES[result['severity'][i]]
+            })
+        return vehicles_info
+    
     def analyze_vehicle(self, bbox, vehicle_tracker_info, view):
         """
         Complete analysis of a vehicle: distance, angle, and collision prediction
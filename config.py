@@ -18,9 +18,91 @@ CAMERA_SOURCES = {
 # Set to None to use multi-view mode, or set to a single input source
 SINGLE_INPUT_MODE = None  # e.g., 0 for live feed, 'video.mp4' for video, 'image.jpg' for image
 
+# Frame prefetching: decode the next frame on a background thread while the current one is processed
+PREFETCH_FRAMES = False
+PREFETCH_QUEUE_SIZE = 4     # Maximum number of decoded frames waiting to be processed
+
+# Live feeds: grab continuously and process only the newest frame (older frames are dropped)
+# Keeps capture-to-alert latency bounded when detection is slower than the camera
+LIVE_LATEST_FRAME_ONLY = False
+LIVE_READ_TIMEOUT = 1.0     # Seconds a live read waits for a new frame before returning none
+
+# Multi-view capture: read all views concurrently (one reader thread per view)
+PARALLEL_CAPTURE = False
+MAX_CAPTURE_SKEW = 0.05     # Max spread of capture times (seconds) within one multi-view frame set
+
+# Multi-view timestamp synchronization (for views running at different FPS)
+# Frame sets are aligned on stream timestamps (media time for videos, capture time for cameras)
+MULTI_VIEW_SYNC = False
+SYNC_REFERENCE_VIEW = None  # View driving the output, None = slowest view
+SYNC_TOLERANCE = 0.02       # Max timestamp difference (seconds) to the reference frame
+SYNC_POLICY = 'duplicate'   # 'drop' skips unmatched frame sets, 'duplicate' repeats a view's last frame
+SYNC_BUFFER_SIZE = 8        # Frames buffered per view while matching timestamps
+
+# Multi-view worker processes: each view's decode/detect/track/analyze chain runs in its own process
+MULTI_PROCESS_VIEWS = False
+WORKER_SEND_FRAMES = True   # Send annotated frames back to the parent for display
+WORKER_FRAME_SCALE = 0.5    # Downscale factor for frames sent back to the parent
+WORKER_QUEUE_SIZE = 2       # Results buffered per view before a worker waits for the parent
+
+# Shared-memory frame ring: capture runs in its own process and hands frames to the
+# view worker through preallocated shared-memory slots instead of pickling them
+SHARED_MEMORY_FRAMES = False
+FRAME_RING_SLOTS = 4        # Frame slots per view (capture can run this many frames ahead)
+
+# Staged pipeline: read, detect, track/analyze and render run on their own threads
+# connected by bounded queues, display stays on the main thread
+PIPELINE_MODE = False
+PIPELINE_QUEUE_SIZE = 2            # Items buffered between two stages
+PIPELINE_DROP_POLICY = 'block'     # Full capture queue: 'block' (backpressure), 'drop-oldest' or 'drop-newest'
+
+# Headless batch mode (--headless): no window or drawing, per-frame results written to a file
+HEADLESS_RESULTS_PATH = 'results.jsonl'  # .jsonl per frame, or .csv/.parquet with one row per vehicle
+RESULTS_CHUNK_ROWS = 65536               # Rows buffered in memory before a .csv/.parquet chunk is written
+
+# Detection cache (--cache): detector output per video frame, keyed by video content,
+# model and conf/iou/class settings, so re-runs over the same footage skip inference
+DETECTION_CACHE_ENABLED = False
+DETECTION_CACHE_DIR = '.detection_cache'
+
+# Detector backend
+# 'pytorch': YOLOv8 weights on PyTorch (ultralytics)
+# 'onnx':    Exported ONNX model on ONNX Runtime (CPU-only machines)
+# 'onnx-int8': Statically quantized ONNX model (create with quantize_model.py)
+DETECTOR_BACKEND = 'pytorch'
+MODEL_PATH = 'yolov8n.pt'
+ONNX_MODEL_PATH = 'yolov8n.onnx'
+ONNX_INT8_MODEL_PATH = 'yolov8n_int8.onnx'
+# ONNX Runtime execution providers in priority order (unavailable ones are skipped)
+# e.g. ['OpenVINOExecutionProvider', 'CPUExecutionProvider'] with onnxruntime-openvino
+ONNX_PROVIDERS = ['CPUExecutionProvider']
+DETECTOR_INPUT_SIZE = 640   # Network input size for the ONNX backend
+
 # Detection settings
 CONFIDENCE_THRESHOLD = 0.25  # Minimum confidence for vehicle detection (lowered for better detection)
 IOU_THRESHOLD = 0.45        # Intersection over Union threshold
+BATCHED_INFERENCE = True    # Multi-view: run all views through the model in a single call
+
+# Detection cadence
+# Frames between detector runs only advance the tracker with its Kalman motion model
+DETECTION_INTERVAL = 1               # Run the detector every N frames (1 = every frame)
+ADAPTIVE_DETECTION_INTERVAL = False  # Stretch the interval based on measured detector latency
+MAX_DETECTION_INTERVAL = 5           # Upper bound for the adaptive interval
+DETECTION_FRAME_BUDGET = 1 / 30      # Detector time (seconds) allowed per frame when adaptive
+
+# Motion gate: reuse the previous detections when the scene is static
+MOTION_GATE_ENABLED = False
+MOTION_GATE_THRESHOLD = 0.005        # Fraction of changed pixels below which a frame is static
+MOTION_GATE_PIXEL_DIFF = 15          # Grayscale difference (0-255) for a pixel to count as changed
+MOTION_GATE_SIZE = (160, 90)         # Downscaled (width, height) used for the comparison
+MOTION_GATE_MAX_REUSE = 30           # Force a detector run after this many reused frames
+
+# Optical flow: propagate tracked bboxes with Lucas-Kanade on frames without detection
+OPTICAL_FLOW_ENABLED = False
+OPTICAL_FLOW_MAX_CORNERS = 20        # Feature points sampled inside each bbox
+OPTICAL_FLOW_MIN_POINTS = 4          # Minimum tracked points to move a bbox
+OPTICAL_FLOW_WIN_SIZE = (21, 21)     # Lucas-Kanade search window
+OPTICAL_FLOW_MAX_LEVEL = 2           # Lucas-Kanade pyramid levels
 
 # Vehicle classes in COCO dataset (YOLOv8)
 # COCO class indices: 
@@ -52,6 +134,10 @@ HIGH_ANGLE = 30.0                # High if within this angle
 MEDIUM_ANGLE = 45.0              # Medium if within this angle
 LOW_ANGLE = 60.0                 # Low if within this angle
 
+# Collision analysis runs as one vectorized batch per view from this many tracked vehicles;
+# below it NumPy call overhead makes the per-vehicle path faster
+COLLISION_BATCH_MIN_VEHICLES = 200
+
 # Legacy parameters (kept for backward compatibility)
 MIN_DISTANCE_THRESHOLD = 50      # Minimum distance in pixels for collision warning
 SPEED_THRESHOLD = 5.0            # Minimum speed (pixels/frame) to consider
@@ -4,8 +4,9 @@ Debug script to test vehicle detection and see what's being detected
 
 import cv2
 import numpy as np
-from ultralytics import YOLO
 from config import *
+from vehicle_detector import create_detector
+from detection_decoder import DET_CONF, DET_CLS
 
 def test_detection_on_frame(frame_path=None, camera_index=0):
     """Test detection on a frame"""
@@ -15,8 +16,9 @@ def test_detection_on_frame(frame_path=None, camera_index=0):
     print("=" * 60)
     
     # Load model
-    print("\nLoading YOLOv8 model...")
-    model = YOLO('yolov8n.pt')
+    print(f"\nLoading YOLOv8 model ({DETECTOR_BACKEND} backend)...")
+    # Detect all classes so the class breakdown below is complete
+    detector = create_detector(DETECTOR_BACKEND, classes=None)
     print("Model loaded!")
     
     # Load frame
@@ -47,32 +49,28 @@ def test_detection_on_frame(frame_path=None, camera_index=0):
     
     for conf_thresh in [0.1, 0.25, 0.5]:
         print(f"\nConfidence threshold: {conf_thresh}")
-        results = model(frame, conf=conf_thresh, verbose=False)
+        detector.conf = conf_thresh
+        detections = detector.detect(frame)
         
-        all_detections = 0
+        all_detections = len(detections)
         vehicle_detections = 0
         detected_classes = {}
         
-        for result in results:
-            if result.boxes is not None and len(result.boxes) > 0:
-                boxes = result.boxes
-                all_detections += len(boxes)
-                
-                for box in boxes:
-                    cls = int(box.cls[0])
-                    conf = float(box.conf[0])
-                    
-                    # Get class name
-                    class_name = model.names[cls] if hasattr(model, 'names') else f"Class_{cls}"
-                    
-                    if cls not in detected_classes:
-                        detected_classes[cls] = []
-                    detected_classes[cls].append((conf, class_name))
-                    
-                    if cls in VEHICLE_CLASSES:
-                        vehicle_detections += 1
-                        x1, y1, x2, y2 = box.xyxy[0].cpu().numpy()
-                        print(f"  ✓ Vehicle detected: {class_name} (conf: {conf:.2f}) at [{int(x1)}, {int(y1)}, {int(x2)}, {int(y2)}]")
+        for det in detections:
+            x, y, w, h = det[:4]
+            cls = int(det[DET_CLS])
+            conf = float(det[DET_CONF])
+            
+            # Get class name
+            class_name = detector.names.get(cls, f"Class_{cls}")
+            
+            if cls not in detected_classes:
+                detected_classes[cls] = []
+            detected_classes[cls].append((conf, class_name))
+            
+            if cls in VEHICLE_CLASSES:
+                vehicle_detections += 1
+                print(f"  ✓ Vehicle detected: {class_name} (conf: {conf:.2f}) at [{int(x)}, {int(y)}, {int(x + w)}, {int(y + h)}]")
         
         print(f"  Total detections: {all_detections}")
         print(f"  Vehicle detections: {vehicle_detections}")
@@ -80,7 +78,7 @@ def test_detection_on_frame(frame_path=None, camera_index=0):
         if detected_classes:
             print(f"  All detected classes:")
             for cls, dets in detected_classes.items():
-                class_name = model.names[cls] if hasattr(model, 'names') else f"Class_{cls}"
+                class_name = detector.names.get(cls, f"Class_{cls}")
                 print(f"    - {class_name} (class {cls}): {len(dets)} detections")
     
     # Visual test
@@ -89,47 +87,44 @@ def test_detection_on_frame(frame_path=None, camera_index=0):
     print("=" * 60)
     
     # Run with current config settings
-    results = model(frame, conf=CONFIDENCE_THRESHOLD, iou=IOU_THRESHOLD, verbose=False)
+    detector.conf = CONFIDENCE_THRESHOLD
+    detections = detector.detect(frame)
     
     output_frame = frame.copy()
     vehicle_count = 0
     
-    for result in results:
-        if result.boxes is not None and len(result.boxes) > 0:
-            boxes = result.boxes
-            for box in boxes:
-                cls = int(box.cls[0])
-                conf = float(box.conf[0])
-                
-                if cls in VEHICLE_CLASSES:
-                    vehicle_count += 1
-                    x1, y1, x2, y2 = box.xyxy[0].cpu().numpy()
-                    x, y, w, h = int(x1), int(y1), int(x2 - x1), int(y2 - y1)
-                    
-                    # Draw box
-                    cv2.rectangle(output_frame, (x, y), (x + w, y + h), (0, 255, 0), 3)
-                    
-                    # Draw label with background for better visibility
-                    class_name = model.names[cls] if hasattr(model, 'names') else f"Class_{cls}"
-                    label = f"{class_name} {conf:.2f}"
-                    
-                    # Draw semi-transparent background
-                    (text_width, text_height), baseline = cv2.getTextSize(
-                        label, cv2.FONT_HERSHEY_SIMPLEX, 0.7, 2)
-                    padding = 5
-                    overlay = output_frame.copy()
-                    cv2.rectangle(overlay, 
-                                 (x - padding, y - text_height - padding - 5),
-                                 (x + text_width + padding, y + baseline + padding),
-                                 (0, 0, 0), -1)
-                    cv2.addWeighted(overlay, 0.7, output_frame, 0.3, 0, output_frame)
-                    
-                    # Draw text with outline
-                    for dx, dy in [(-1,-1), (-1,0), (-1,1), (0,-1), (0,1), (1,-1), (1,0), (1,1)]:
-                        cv2.putText(output_frame, label, (x + dx, y - 10 + dy),
-                                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 0), 3)
-                    cv2.putText(output_frame, label, (x, y - 10),
-                               cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+    for det in detections:
+        cls = int(det[DET_CLS])
+        conf = float(det[DET_CONF])
+        
+        if cls in VEHICLE_CLASSES:
+            vehicle_count += 1
+            x, y, w, h = (int(v) for v in det[:4])
+            
+            # Draw box
+            cv2.rectangle(output_frame, (x, y), (x + w, y + h), (0, 255, 0), 3)
+            
+            # Draw label with background for better visibility
+            class_name = detector.names.get(cls, f"Class_{cls}")
+            label = f"{class_name} {conf:.2f}"
+            
+            # Draw semi-transparent background
+            (text_width, text_height), baseline = cv2.getTextSize(
+                label, cv2.FONT_HERSHEY_SIMPLEX, 0.7, 2)
+            padding = 5
+            overlay = output_frame.copy()
+            cv2.rectangle(overlay, 
+                         (x - padding, y - text_height - padding - 5),
+                         (x + text_width + padding, y + baseline + padding),
+                         (0, 0, 0), -1)
+            cv2.addWeighted(overlay, 0.7, output_frame, 0.3, 0, output_frame)
+            
+            # Draw text with outline
+            for dx, dy in [(-1,-1), (-1,0), (-1,1), (0,-1), (0,1), (1,-1), (1,0), (1,1)]:
+                cv2.putText(output_frame, label, (x + dx, y - 10 + dy),
+                           cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 0), 3)
+            cv2.putText(output_frame, label, (x, y - 10),
+                       cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
     
     # Add info text
     info_text = f"Vehicles detected: {vehicle_count} (Conf: {CONFIDENCE_THRESHOLD})"
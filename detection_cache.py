@@ -0,0 +1,128 @@
+"""
+On-disk cache of detector output for replaying the same footage without inference
+"""
+
+import hashlib
+import json
+import os
+import numpy as np
+from config import DETECTION_CACHE_DIR
+
+
+def file_content_hash(path, chunk_size=1 << 20):
+    """SHA-1 of a file's content (so renamed or copied videos hit the same cache)"""
+    sha = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+class DetectionCache:
+    """
+    Detections per frame index of one video, for one detector configuration
+
+    Stored as two .npy files read back memory-mapped:
+        index.npy      (frames, 2) int64 rows of (start, count), count -1 = not cached
+        detections.npy (N, 6) float32 rows of (x, y, w, h, conf, cls)
+    New detections are kept in memory and merged into the files on save().
+    """
+
+    def __init__(self, source_path, detector_settings, cache_dir=DETECTION_CACHE_DIR):
+        """
+        Open (or start) the cache for a video and detector configuration
+
+        Args:
+            source_path: Video file
+            detector_settings: VehicleDetector.get_settings() (model hash, conf, iou, classes, ...)
+            cache_dir: Directory holding all caches
+        """
+        print(f"Hashing {source_path} for the detection cache...")
+        key_data = {'source': file_content_hash(source_path), 'detector': detector_settings}
+        key = hashlib.sha1(json.dumps(key_data, sort_keys=True).encode()).hexdigest()[:20]
+        self.path = os.path.join(cache_dir, key)
+        self.index = None
+        self.detections = None
+        self.new_detections = {}
+        self.hits = 0
+        self.misses = 0
+
+        index_path = os.path.join(self.path, 'index.npy')
+        if os.path.isfile(index_path):
+            self.index = np.load(index_path, mmap_mode='r')
+            self.detections = np.load(os.path.join(self.path, 'detections.npy'), mmap_mode='r')
+            cached = int(np.count_nonzero(self.index[:, 1] >= 0))
+            print(f"Detection cache: {cached} frames cached in {self.path}")
+        else:
+            # Key settings next to the data so a cache directory can be identified later
+            os.makedirs(self.path, exist_ok=True)
+            with open(os.path.join(self.path, 'key.json'), 'w') as f:
+                json.dump(key_data, f, indent=2)
+            print(f"Detection cache: new cache in {self.path}")
+
+    def get(self, frame_index):
+        """
+        Look up the detections of a frame
+
+        Returns:
+            (N, 6) detection array, or None if the frame is not cached
+        """
+        if frame_index in self.new_detections:
+            self.hits += 1
+            return self.new_detections[frame_index]
+        if self.index is not None and 0 <= frame_index < len(self.index):
+            start, count = self.index[frame_index]
+            if count >= 0:
+                self.hits += 1
+                return np.asarray(self.detections[start:start + count])
+        self.misses += 1
+        return None
+
+    def put(self, frame_index, detections):
+        """Store the detections of a frame (written to disk on save())"""
+        self.new_detections[frame_index] = np.asarray(detections, dtype=np.float32).reshape(-1, 6)
+
+    def save(self):
+        """Merge new detections with the cached ones and rewrite the cache files"""
+        if not self.new_detections:
+            return
+
+        num_frames = max(self.new_detections) + 1
+        if self.index is not None:
+            num_frames = max(num_frames, len(self.index))
+
+        index = np.full((num_frames, 2), -1, dtype=np.int64)
+        chunks = []
+        offset = 0
+        for frame_index in range(num_frames):
+            detections = self.new_detections.get(frame_index)
+            if detections is None and self.index is not None and frame_index < len(self.index):
+                start, count = self.index[frame_index]
+                if count >= 0:
+                    detections = self.detections[start:start + count]
+            if detections is None:
+                continue
+            index[frame_index] = (offset, len(detections))
+            chunks.append(np.asarray(detections, dtype=np.float32))
+            offset += len(detections)
+
+        all_detections = np.concatenate(chunks) if chunks else np.zeros((0, 6), dtype=np.float32)
+        # Write new files and swap them in, existing memory maps keep reading the old ones
+        for name, array in (('detections.npy', all_detections), ('index.npy', index)):
+            tmp_path = os.path.join(self.path, 'tmp_' + name)
+            np.save(tmp_path, array)
+            os.replace(tmp_path, os.path.join(self.path, name))
+
+        self.index = np.load(os.path.join(self.path, 'index.npy'), mmap_mode='r')
+        self.detections = np.load(os.path.join(self.path, 'detections.npy'), mmap_mode='r')
+        self.new_detections = {}
+
+    def get_stats(self):
+        """Get cache statistics"""
+        lookups = self.hits + self.misses
+        return {
+            'path': self.path,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0
+        }
@@ -0,0 +1,82 @@
+"""
+Vectorized decoding of YOLOv8 detection results into vehicle boxes
+"""
+
+import numpy as np
+from config import VEHICLE_CLASSES
+
+
+# Column layout of a decoded detection array
+DET_X, DET_Y, DET_W, DET_H, DET_CONF, DET_CLS = range(6)
+
+
+def _to_numpy(values):
+    """Convert a torch tensor (or array-like) to a NumPy array"""
+    if hasattr(values, 'cpu'):
+        values = values.cpu().numpy()
+    return np.asarray(values)
+
+
+def decode_boxes(xyxy, conf, cls, vehicle_classes=VEHICLE_CLASSES):
+    """
+    Filter and convert raw boxes to vehicle detections using array operations
+
+    Args:
+        xyxy: (N, 4) array of (x1, y1, x2, y2) corners
+        conf: (N,) array of confidences
+        cls: (N,) array of class indices
+        vehicle_classes: Class indices to keep
+
+    Returns:
+        (M, 6) float32 array with rows (x, y, w, h, conf, cls)
+    """
+    xyxy = np.asarray(xyxy, dtype=np.float32).reshape(-1, 4)
+    conf = np.asarray(conf, dtype=np.float32).reshape(-1)
+    cls = np.asarray(cls).reshape(-1).astype(np.int64)
+
+    # Keep vehicle classes only
+    mask = np.isin(cls, vehicle_classes)
+
+    # Integer pixel boxes (truncated like int()) in xywh format
+    corners = np.trunc(xyxy)
+    x = corners[:, 0]
+    y = corners[:, 1]
+    w = np.trunc(xyxy[:, 2] - xyxy[:, 0])
+    h = np.trunc(xyxy[:, 3] - xyxy[:, 1])
+
+    # Ensure valid bounding boxes
+    mask &= (w > 0) & (h > 0) & (x >= 0) & (y >= 0)
+
+    detections = np.empty((int(mask.sum()), 6), dtype=np.float32)
+    detections[:, DET_X] = x[mask]
+    detections[:, DET_Y] = y[mask]
+    detections[:, DET_W] = w[mask]
+    detections[:, DET_H] = h[mask]
+    detections[:, DET_CONF] = conf[mask]
+    detections[:, DET_CLS] = cls[mask]
+    return detections
+
+
+def decode_result(result, vehicle_classes=VEHICLE_CLASSES):
+    """
+    Decode a single YOLOv8 result into vehicle detections
+
+    Args:
+        result: ultralytics Results object
+        vehicle_classes: Class indices to keep
+
+    Returns:
+        (N, 6) float32 array with rows (x, y, w, h, conf, cls)
+    """
+    boxes = result.boxes
+    if boxes is None or len(boxes) == 0:
+        return np.empty((0, 6), dtype=np.float32)
+
+    # Pull each field off the device once for the whole result
+    return decode_boxes(_to_numpy(boxes.xyxy), _to_numpy(boxes.conf),
+                        _to_numpy(boxes.cls), vehicle_classes)
+
+
+def to_bbox_list(detections):
+    """Convert a decoded detection array to a list of (x, y, w, h) integer tuples"""
+    return [tuple(row) for row in detections[:, :4].astype(np.int32).tolist()]
@@ -0,0 +1,139 @@
+"""
+Scheduling of detector runs between tracker-only frames
+"""
+
+import math
+import cv2
+import numpy as np
+from config import (DETECTION_INTERVAL, ADAPTIVE_DETECTION_INTERVAL,
+                    MAX_DETECTION_INTERVAL, DETECTION_FRAME_BUDGET,
+                    MOTION_GATE_THRESHOLD, MOTION_GATE_PIXEL_DIFF, MOTION_GATE_SIZE,
+                    MOTION_GATE_MAX_REUSE)
+
+
+class DetectionScheduler:
+    """Decides on which frames the detector runs; other frames only advance the tracker"""
+
+    def __init__(self, interval=DETECTION_INTERVAL, adaptive=ADAPTIVE_DETECTION_INTERVAL,
+                 max_interval=MAX_DETECTION_INTERVAL, frame_budget=DETECTION_FRAME_BUDGET):
+        """
+        Initialize the scheduler
+
+        Args:
+            interval: Run the detector every N frames (minimum interval when adaptive)
+            adaptive: Stretch the interval so detection cost fits in the frame budget
+            max_interval: Upper bound for the adaptive interval
+            frame_budget: Detection time (seconds) that may be spent per frame
+        """
+        self.base_interval = max(1, int(interval))
+        self.interval = self.base_interval
+        self.adaptive = adaptive
+        self.max_interval = max(self.base_interval, int(max_interval))
+        self.frame_budget = frame_budget
+        self.frames_since_detection = None
+        self.avg_latency = None
+        self.detected_frames = 0
+        self.skipped_frames = 0
+
+    def should_detect(self):
+        """Check whether the detector should run on the current frame"""
+        if self.frames_since_detection is None:
+            return True
+        return self.frames_since_detection + 1 >= self.interval
+
+    def record_detection(self, latency=None):
+        """Record a detector run and its latency in seconds (None if detections were reused)"""
+        self.frames_since_detection = 0
+        self.detected_frames += 1
+        if latency is None:
+            return
+
+        # Exponential moving average of detector latency
+        if self.avg_latency is None:
+            self.avg_latency = latency
+        else:
+            self.avg_latency = 0.8 * self.avg_latency + 0.2 * latency
+
+        if self.adaptive and self.frame_budget > 0:
+            needed = math.ceil(self.avg_latency / self.frame_budget)
+            self.interval = max(self.base_interval, min(needed, self.max_interval))
+
+    def record_skip(self):
+        """Record a tracker-only frame"""
+        if self.frames_since_detection is not None:
+            self.frames_since_detection += 1
+        self.skipped_frames += 1
+
+    def get_stats(self):
+        """Get scheduling statistics"""
+        total = self.detected_frames + self.skipped_frames
+        return {
+            'interval': self.interval,
+            'detected_frames': self.detected_frames,
+            'skipped_frames': self.skipped_frames,
+            'detection_ratio': self.detected_frames / total if total else 0.0,
+            'avg_latency_ms': (self.avg_latency or 0.0) * 1000
+        }
+
+
+class MotionGate:
+    """Skips detection when a frame barely differs from the last detected frame"""
+
+    def __init__(self, threshold=MOTION_GATE_THRESHOLD, pixel_diff=MOTION_GATE_PIXEL_DIFF,
+                 size=MOTION_GATE_SIZE, max_reuse=MOTION_GATE_MAX_REUSE):
+        """
+        Initialize the motion gate
+
+        Args:
+            threshold: Fraction of changed pixels below which the scene counts as static
+            pixel_diff: Grayscale difference (0-255) for a pixel to count as changed
+            size: (width, height) the frames are downscaled to before comparing
+            max_reuse: Force a detector run after this many consecutive reuses
+        """
+        self.threshold = threshold
+        self.pixel_diff = pixel_diff
+        self.size = tuple(size)
+        self.max_reuse = max_reuse
+        self.reference = None
+        self.reuse_count = 0
+        self.last_energy = 0.0
+        self.checks = 0
+        self.hits = 0
+
+    def _downscale(self, frame):
+        small = cv2.resize(frame, self.size, interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return small
+
+    def is_static(self, frame):
+        """
+        Check whether the previous detections can be reused for this frame
+
+        On a miss the frame becomes the new reference, since the detector will run on it.
+        """
+        small = self._downscale(frame)
+        self.checks += 1
+
+        if self.reference is not None:
+            # Motion energy: fraction of pixels that changed since the last detected frame
+            diff = cv2.absdiff(small, self.reference)
+            self.last_energy = float(np.count_nonzero(diff > self.pixel_diff)) / diff.size
+            if self.last_energy < self.threshold and self.reuse_count < self.max_reuse:
+                self.reuse_count += 1
+                self.hits += 1
+                return True
+
+        self.reference = small
+        self.reuse_count = 0
+        return False
+
+    def get_stats(self):
+        """Get gating statistics"""
+        return {
+            'threshold': self.threshold,
+            'checks': self.checks,
+            'hits': self.hits,
+            'hit_rate': self.hits / self.checks if self.checks else 0.0,
+            'last_energy': self.last_energy
+        }
@@ -0,0 +1,267 @@
+"""
+Shared-memory frame ring buffer for passing frames between processes without copies
+"""
+
+import time
+import numpy as np
+from multiprocessing import shared_memory
+from config import FRAME_RING_SLOTS
+
+# Slot status values in the metadata row (frame index, timestamp, status)
+STATUS_FRAME = 1.0
+STATUS_END = 0.0
+
+
+def _attach(name):
+    """Attach to an existing shared memory block without taking ownership of it"""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13 always registers the block, but child processes share the
+        # creator's resource tracker so this is a no-op and the creator still unlinks it
+        return shared_memory.SharedMemory(name=name)
+
+
+class SharedFrameRing:
+    """
+    Single-producer / single-consumer ring of preallocated uint8 frame slots
+
+    Index protocol: the producer and consumer each keep a local counter and use
+    slot = counter % slots. A 'free' semaphore counts slots the producer may
+    write and a 'filled' semaphore counts slots ready for the consumer. Each slot
+    has a metadata row (frame index, timestamp, status) where status marks a
+    frame or the end of the stream. The producer copies each decoded frame into
+    its slot once (OpenCV may or may not decode in place, depending on the build)
+    and the consumer reads it as a NumPy view of the same memory, so frames are
+    never pickled or copied on the consumer side.
+    """
+
+    def __init__(self, shape, slots=FRAME_RING_SLOTS, context=None):
+        """
+        Create a ring in shared memory
+
+        Args:
+            shape: Frame shape (height, width, channels)
+            slots: Number of frame slots
+            context: multiprocessing context used to create the semaphores
+        """
+        import multiprocessing as mp
+
+        context = context or mp.get_context()
+        self.shape = tuple(shape)
+        self.slots = int(slots)
+        frame_bytes = int(np.prod(self.shape))
+        self._frames_shm = shared_memory.SharedMemory(create=True, size=frame_bytes * self.slots)
+        self._meta_shm = shared_memory.SharedMemory(create=True, size=8 * 3 * self.slots)
+        self._owner = True
+        self.free = context.Semaphore(self.slots)
+        self.filled = context.Semaphore(0)
+        self._map_arrays()
+        self._write_count = 0
+        self._read_count = 0
+        self._holding = False
+
+    def _map_arrays(self):
+        self.frames = np.ndarray((self.slots,) + self.shape, dtype=np.uint8, buffer=self._frames_shm.buf)
+        self.meta = np.ndarray((self.slots, 3), dtype=np.float64, buffer=self._meta_shm.buf)
+
+    def __getstate__(self):
+        # Only names and semaphores cross the process boundary, never frame data
+        return {
+            'shape': self.shape,
+            'slots': self.slots,
+            'frames_name': self._frames_shm.name,
+            'meta_name': self._meta_shm.name,
+            'free': self.free,
+            'filled': self.filled
+        }
+
+    def __setstate__(self, state):
+        self.shape = state['shape']
+        self.slots = state['slots']
+        self.free = state['free']
+        self.filled = state['filled']
+        self._frames_shm = _attach(state['frames_name'])
+        self._meta_shm = _attach(state['meta_name'])
+        self._owner = False
+        self._map_arrays()
+        self._write_count = 0
+        self._read_count = 0
+        self._holding = False
+
+    # Producer side
+
+    def acquire_write(self, timeout=None):
+        """
+        Wait for a free slot
+
+        Returns:
+            Writable (height, width, channels) view of the slot, or None on timeout
+        """
+        if not self.free.acquire(timeout=timeout):
+            return None
+        return self.frames[self._write_count % self.slots]
+
+    def commit_write(self, frame_index, timestamp, end=False):
+        """Publish the slot returned by acquire_write()"""
+        slot = self._write_count % self.slots
+        self.meta[slot] = (frame_index, timestamp, STATUS_END if end else STATUS_FRAME)
+        self._write_count += 1
+        self.filled.release()
+
+    # Consumer side
+
+    def acquire_read(self, timeout=None):
+        """
+        Wait for the next filled slot
+
+        The returned frame stays valid until release_read() is called.
+
+        Returns:
+            (frame, frame_index, timestamp), (None, -1, 0.0) at end of stream, or None on timeout
+        """
+        if not self.filled.acquire(timeout=timeout):
+            return None
+        slot = self._read_count % self.slots
+        self._holding = True
+        frame_index, timestamp, status = self.meta[slot]
+        if status == STATUS_END:
+            return None, -1, 0.0
+        return self.frames[slot], int(frame_index), float(timestamp)
+
+    def release_read(self):
+        """Hand the slot of the last acquire_read() back to the producer"""
+        if not self._holding:
+            return
+        self._holding = False
+        self._read_count += 1
+        self.free.release()
+
+    def close(self):
+        """Detach from shared memory (and free it if this process created it)"""
+        self.frames = None
+        self.meta = None
+        self._frames_shm.close()
+        self._meta_shm.close()
+        if self._owner:
+            self._frames_shm.unlink()
+            self._meta_shm.unlink()
+
+
+class SharedFrameReader:
+    """InputHandler-compatible consumer reading frames from a SharedFrameRing"""
+
+    def __init__(self, ring, properties, timeout=1.0):
+        """
+        Initialize the reader
+
+        Args:
+            ring: SharedFrameRing filled by capture_producer()
+            properties: InputHandler.get_properties() of the producer's input
+            timeout: Seconds to wait for a frame before returning no frame
+        """
+        self.ring = ring
+        self.timeout = timeout
+        self.input_type = properties['type']
+        self.is_image = properties['is_image']
+        self.is_video = properties['is_video']
+        self.is_live = properties['is_live']
+        self.total_frames = properties['total_frames']
+        self.fps = properties['fps']
+        self.cap = None
+        self.image = None
+        self.frame_count = 0
+        self.capture_time = None
+        self.timestamp = None
+        self.finished = False
+
+    def read(self):
+        """Read the next frame as a zero-copy view of its ring slot"""
+        # The previous frame has been fully processed by now
+        self.ring.release_read()
+        if self.finished:
+            return False, None
+
+        item = self.ring.acquire_read(timeout=self.timeout)
+        if item is None:
+            return False, None
+        frame, frame_index, timestamp = item
+        if frame is None:
+            self.finished = True
+            return False, None
+
+        self.frame_count = frame_index
+        self.capture_time = time.time()
+        self.timestamp = timestamp
+        return True, frame
+
+    def get_frame_size(self):
+        height, width = self.ring.shape[:2]
+        return width, height
+
+    def get_frame_number(self):
+        return self.frame_count
+
+    def get_total_frames(self):
+        return self.total_frames
+
+    def get_fps(self):
+        return self.fps
+
+    def is_finished(self):
+        return self.finished
+
+    def reset(self):
+        pass  # Not supported, the producer owns the input
+
+    def get_prefetch_stats(self):
+        return None
+
+    def get_live_stats(self):
+        return None
+
+    def release(self):
+        self.ring.release_read()
+        self.ring.close()
+
+    def get_properties(self):
+        return {
+            'type': self.input_type,
+            'is_image': self.is_image,
+            'is_video': self.is_video,
+            'is_live': self.is_live,
+            'frame_count': self.frame_count,
+            'total_frames': self.total_frames,
+            'fps': self.fps
+        }
+
+
+def capture_producer(source, ring, stop_event):
+    """
+    Decode frames of a source into ring slots (run in its own process)
+
+    Args:
+        source: Input source accepted by InputHandler
+        ring: SharedFrameRing to fill
+        stop_event: multiprocessing Event to stop early
+    """
+    from input_handler import InputHandler
+
+    handler = InputHandler(source, prefetch=False)
+    try:
+        while not stop_event.is_set():
+            slot = ring.acquire_write(timeout=0.1)
+            if slot is None:
+                continue
+            if not handler.read_into(slot):
+                if handler.is_finished() or handler.is_image or handler.is_video:
+                    ring.commit_write(-1, 0.0, end=True)
+                    break
+                # Transient camera failure: hand the slot back by retrying into it
+                ring.free.release()
+                time.sleep(0.01)
+                continue
+            ring.commit_write(handler.get_frame_number(), handler.timestamp or 0.0)
+    finally:
+        handler.release()
+        ring.close()
@@ -10,7 +10,6 @@ import numpy as np
 from PIL import Image, ImageTk
 import threading
 import time
-from ultralytics import YOLO
 from config import *
 from config import (CRITICAL_DISTANCE, HIGH_DISTANCE, MEDIUM_DISTANCE, LOW_DISTANCE,
                     CRITICAL_SPEED, HIGH_SPEED, MEDIUM_SPEED, LOW_SPEED,
@@ -19,6 +18,8 @@ from vehicle_tracker import VehicleTracker
 from collision_detector import CollisionDetector
 from alert_system import AlertSystem
 from input_handler import InputHandler
+from detection_decoder import to_bbox_list
+from vehicle_detector import create_detector
 
 
 class CollisionDetectionGUI:
@@ -38,7 +39,7 @@ class CollisionDetectionGUI:
         self.input_handler = None
         
         # Detection components
-        self.model = None
+        self.detector = None
         self.tracker = None
         self.collision_detector = None
         self.alert_system = None
@@ -376,7 +377,7 @@ class CollisionDetectionGUI:
         def load_model():
             try:
                 self.model_status_label.config(text="Loading YOLOv8 model...", fg='#ffc107')
-                self.model = YOLO('yolov8n.pt')
+                self.detector = create_detector(DETECTOR_BACKEND)
                 self.model_status_label.config(text="Model loaded successfully", fg='#28a745')
             except Exception as e:
                 self.model_status_label.config(text=f"Error loading model: {str(e)}", fg='#dc3545')
@@ -435,7 +436,7 @@ class CollisionDetectionGUI:
     
     def start_detection(self):
         """Start the detection process"""
-        if self.model is None:
+        if self.detector is None:
             messagebox.showerror("Error", "Model is still loading. Please wait...")
             return
         
@@ -582,36 +583,15 @@ class CollisionDetectionGUI:
     
     def detect_vehicles(self, frame):
         """Detect vehicles in frame"""
-        if self.model is None:
+        if self.detector is None:
             return []
         
         try:
-            results = self.model(frame, conf=CONFIDENCE_THRESHOLD, iou=IOU_THRESHOLD, verbose=False)
-            
-            detections = []
-            all_detections_count = 0
-            
-            for result in results:
-                if result.boxes is not None and len(result.boxes) > 0:
-                    boxes = result.boxes
-                    all_detections_count += len(boxes)
-                    
-                    for box in boxes:
-                        cls = int(box.cls[0])
-                        conf = float(box.conf[0])
-                        
-                        # Check if it's a vehicle class
-                        if cls in VEHICLE_CLASSES:
-                            x1, y1, x2, y2 = box.xyxy[0].cpu().numpy()
-                            x, y, w, h = int(x1), int(y1), int(x2 - x1), int(y2 - y1)
-                            
-                            # Ensure valid bounding box
-                            if w > 0 and h > 0 and x >= 0 and y >= 0:
-                                detections.append((x, y, w, h))
+            detections = to_bbox_list(self.detector.detect(frame))
             
             # Debug: Print detection info (can be removed later)
             if len(detections) > 0:
-                print(f"Detected {len(detections)} vehicles (out of {all_detections_count} total detections)")
+                print(f"Detected {len(detections)} vehicles")
             
             return detections
         except Exception as e:
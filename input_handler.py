@@ -4,20 +4,32 @@ Input handler for different input types: image, video, and live feed
 
 import cv2
 import os
+import queue
+import threading
+import time
 import numpy as np
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from config import (PREFETCH_FRAMES, PREFETCH_QUEUE_SIZE, LIVE_LATEST_FRAME_ONLY, LIVE_READ_TIMEOUT,
+                    PARALLEL_CAPTURE, MAX_CAPTURE_SKEW, SYNC_REFERENCE_VIEW,
+                    SYNC_TOLERANCE, SYNC_POLICY, SYNC_BUFFER_SIZE)
 
 
 class InputHandler:
     """Handles different input types: image, video file, or live camera feed"""
     
-    def __init__(self, input_source, input_type='auto'):
+    def __init__(self, input_source, input_type='auto', prefetch=PREFETCH_FRAMES,
+                 queue_size=PREFETCH_QUEUE_SIZE, latest_only=LIVE_LATEST_FRAME_ONLY):
         """
         Initialize input handler
         
         Args:
             input_source: Path to image/video file, or camera index (int)
             input_type: 'image', 'video', 'live', or 'auto' (auto-detect)
+            prefetch: Decode frames on a background thread into a bounded queue
+            queue_size: Maximum number of prefetched frames
+            latest_only: For live feeds, grab continuously and only ever return the newest frame
         """
         self.input_source = input_source
         self.input_type = input_type
@@ -29,6 +41,29 @@ class InputHandler:
         self.frame_count = 0
         self.total_frames = 0
         self.fps = 30.0
+        self.capture_time = None  # Wall-clock time the last returned frame was captured
+        self.timestamp = None     # Stream time (seconds) of the last frame: media time for videos
+        
+        # Background prefetching (started lazily on the first read)
+        self.prefetch = prefetch
+        self.queue_size = max(1, int(queue_size))
+        self._frame_queue = None
+        self._reader_thread = None
+        self._stop_event = threading.Event()
+        self._decode_wait = 0.0
+        self._queue_depth_sum = 0
+        self._prefetch_reads = 0
+        
+        # Latest-frame-only capture for live feeds
+        self.latest_only = latest_only
+        self._latest_cond = threading.Condition()
+        self._latest_frame = None
+        self._latest_time = 0.0
+        self._latest_seq = 0
+        self._consumed_seq = 0
+        self._dropped_frames = 0
+        self._frame_age_sum = 0.0
+        self._latest_reads = 0
         
         # Auto-detect input type if not specified
         if input_type == 'auto':
@@ -113,6 +148,9 @@ class InputHandler:
         # Set camera properties
         self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, 1280)
         self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 720)
+        if self.latest_only:
+            # Keep the driver-side buffer minimal, the grabber thread holds the newest frame
+            self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
         
         width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
         height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
@@ -130,18 +168,194 @@ class InputHandler:
         if self.is_image:
             if self.frame_count == 0:
                 self.frame_count = 1
+                self.capture_time = time.time()
+                self.timestamp = 0.0
                 return True, self.image.copy()
             else:
                 return False, None
         
         elif self.is_video or self.is_live:
-            ret, frame = self.cap.read()
+            if self.is_live and self.latest_only:
+                ret, frame = self._read_latest()
+            elif self.prefetch:
+                ret, frame = self._read_prefetched()
+            else:
+                ret, frame = self.cap.read()
+                self.capture_time = time.time()
+                self.timestamp = self._stream_timestamp(self.capture_time)
             if ret:
                 self.frame_count += 1
             return ret, frame
         
         return False, None
     
+    def read_into(self, out):
+        """
+        Read the next frame into a preallocated buffer (e.g. a shared-memory ring slot)
+        
+        Args:
+            out: uint8 array of shape (height, width, 3) to decode into
+        
+        Returns:
+            True if a frame was written to out
+        """
+        if self.is_image or self.prefetch or (self.is_live and self.latest_only):
+            ret, frame = self.read()
+        else:
+            # Offer the buffer to OpenCV; builds that decode into a new array instead
+            # are handled below with one copy into the buffer
+            ret, frame = self.cap.read(out)
+            self.capture_time = time.time()
+            self.timestamp = self._stream_timestamp(self.capture_time)
+            if ret:
+                self.frame_count += 1
+        
+        if not ret or frame is None:
+            return False
+        if frame is not out:
+            if frame.shape == out.shape:
+                np.copyto(out, frame)
+            else:
+                cv2.resize(frame, (out.shape[1], out.shape[0]), dst=out)
+        return True
+    
+    def get_frame_size(self):
+        """Get (width, height) of the frames"""
+        if self.is_image:
+            h, w = self.image.shape[:2]
+            return w, h
+        w = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        h = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        return w, h
+    
+    def _stream_timestamp(self, capture_time):
+        """Timestamp of the frame just read: media position for videos, capture time for live feeds"""
+        if self.is_video:
+            return self.cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
+        return capture_time
+    
+    def _start_reader(self):
+        """Start the background decoding thread"""
+        self._stop_event.clear()
+        if self.is_live and self.latest_only:
+            target = self._grabber_loop
+        else:
+            self._frame_queue = queue.Queue(maxsize=self.queue_size)
+            target = self._reader_loop
+        self._reader_thread = threading.Thread(target=target, daemon=True)
+        self._reader_thread.start()
+    
+    def _stop_reader(self):
+        """Stop the background decoding thread and drop queued frames"""
+        if self._reader_thread is None:
+            return
+        self._stop_event.set()
+        self._reader_thread.join(timeout=2.0)
+        self._reader_thread = None
+        self._frame_queue = None
+    
+    def _reader_loop(self):
+        """Decode frames ahead of the processing thread"""
+        while not self._stop_event.is_set():
+            ret, frame = self.cap.read()
+            if not ret and self.is_live:
+                time.sleep(0.01)  # Transient camera failure, keep trying
+                continue
+            
+            # Block while the queue is full, but stay responsive to stop requests
+            capture_time = time.time()
+            item = (ret, frame, capture_time, self._stream_timestamp(capture_time))
+            while not self._stop_event.is_set():
+                try:
+                    self._frame_queue.put(item, timeout=0.1)
+                    break
+                except queue.Full:
+                    continue
+            
+            if not ret:
+                break  # End of video
+    
+    def _read_prefetched(self):
+        """Take the next decoded frame from the prefetch queue"""
+        if self._reader_thread is None and self._frame_queue is None:
+            self._start_reader()
+        
+        self._queue_depth_sum += self._frame_queue.qsize()
+        self._prefetch_reads += 1
+        
+        # Time spent waiting here is decode time not hidden behind processing
+        start = time.perf_counter()
+        try:
+            while True:
+                try:
+                    ret, frame, self.capture_time, self.timestamp = self._frame_queue.get(timeout=0.1)
+                    return ret, frame
+                except queue.Empty:
+                    if not self._reader_thread.is_alive() and self._frame_queue.empty():
+                        return False, None
+                    # A stalled camera keeps the reader retrying; return no frame so the
+                    # caller's loop (and its key handling) keeps running
+                    if self.is_live and time.perf_counter() - start > LIVE_READ_TIMEOUT:
+                        return False, None
+        finally:
+            self._decode_wait += time.perf_counter() - start
+    
+    def _grabber_loop(self):
+        """Continuously grab camera frames, keeping only the newest one"""
+        while not self._stop_event.is_set():
+            ret, frame = self.cap.read()
+            if not ret:
+                time.sleep(0.01)
+                continue
+            with self._latest_cond:
+                if self._latest_seq > self._consumed_seq:
+                    self._dropped_frames += 1  # Previous frame was never processed
+                self._latest_frame = frame
+                self._latest_time = time.time()
+                self._latest_seq += 1
+                self._latest_cond.notify()
+    
+    def _read_latest(self):
+        """Return the newest captured frame, waiting only if it was already consumed"""
+        if self._reader_thread is None:
+            self._start_reader()
+        
+        with self._latest_cond:
+            if not self._latest_cond.wait_for(lambda: self._latest_seq > self._consumed_seq,
+                                              timeout=LIVE_READ_TIMEOUT):
+                return False, None
+            self._consumed_seq = self._latest_seq
+            frame = self._latest_frame
+            self.capture_time = self._latest_time
+            self.timestamp = self._latest_time
+            self._frame_age_sum += time.time() - self._latest_time
+            self._latest_reads += 1
+        return True, frame
+    
+    def get_live_stats(self):
+        """Get latest-frame-only capture statistics (None when the mode is not active)"""
+        if not (self.is_live and self.latest_only):
+            return None
+        reads = self._latest_reads
+        return {
+            'captured_frames': self._latest_seq,
+            'dropped_frames': self._dropped_frames,
+            'avg_frame_age_ms': self._frame_age_sum * 1000 / reads if reads else 0.0
+        }
+    
+    def get_prefetch_stats(self):
+        """Get prefetch queue statistics (None when prefetching is disabled)"""
+        if not self.prefetch or self.is_image or (self.is_live and self.latest_only):
+            return None
+        reads = self._prefetch_reads
+        return {
+            'queue_size': self.queue_size,
+            'queue_depth': self._frame_queue.qsize() if self._frame_queue is not None else 0,
+            'avg_queue_depth': self._queue_depth_sum / reads if reads else 0.0,
+            'total_decode_wait_ms': self._decode_wait * 1000,
+            'avg_decode_wait_ms': self._decode_wait * 1000 / reads if reads else 0.0
+        }
+    
     def get_frame_number(self):
         """Get current frame number"""
         return self.frame_count
@@ -169,11 +383,13 @@ class InputHandler:
         if self.is_image:
             self.frame_count = 0
         elif self.is_video and self.cap is not None:
+            self._stop_reader()
             self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
             self.frame_count = 0
     
     def release(self):
         """Release resources"""
+        self._stop_reader()
         if self.cap is not None:
             self.cap.release()
         self.cap = None
@@ -194,16 +410,26 @@ class InputHandler:
 class MultiInputHandler:
     """Handles multiple inputs for multi-view system"""
     
-    def __init__(self, input_sources):
+    def __init__(self, input_sources, parallel=PARALLEL_CAPTURE, max_skew=MAX_CAPTURE_SKEW):
         """
         Initialize multi-input handler
         
         Args:
             input_sources: Dict with view names as keys and input sources as values
                           e.g., {'front': 0, 'back': 'video.mp4', 'left': 'image.jpg'}
+            parallel: Read all views concurrently, one reader thread per view
+            max_skew: Maximum spread (seconds) of capture times within one frame set
+                      before lagging live views are re-read (parallel mode)
         """
         self.input_handlers = {}
         self.views = list(input_sources.keys())
+        self.parallel = parallel
+        self.max_skew = max_skew
+        self.capture_timestamps = {}
+        self.last_skew = 0.0
+        self.skew_violations = 0
+        self.frame_sets = 0
+        self._executor = None
         
         for view, source in input_sources.items():
             if source is not None:
@@ -212,6 +438,10 @@ class MultiInputHandler:
                     print(f"Initialized {view} view: {source}")
                 except Exception as e:
                     print(f"Warning: Could not initialize {view} view ({source}): {e}")
+        
+        if self.parallel and self.input_handlers:
+            self._executor = ThreadPoolExecutor(max_workers=len(self.input_handlers),
+                                                thread_name_prefix='capture')
     
     def read_all(self):
         """
@@ -220,12 +450,63 @@ class MultiInputHandler:
         Returns:
             Dict with view names as keys and (ret, frame) tuples as values
         """
-        frames = {}
-        for view, handler in self.input_handlers.items():
-            ret, frame = handler.read()
-            frames[view] = (ret, frame)
+        if self._executor is not None:
+            return self._read_all_parallel()
+        return self.read_views(list(self.input_handlers.keys()))
+    
+    def read_views(self, views):
+        """
+        Read the next frame of the given views (concurrently in parallel mode)
+        
+        Returns:
+            Dict with view names as keys and (ret, frame) tuples as values
+        """
+        if self._executor is not None:
+            futures = {view: self._executor.submit(self.input_handlers[view].read) for view in views}
+            frames = {view: future.result() for view, future in futures.items()}
+        else:
+            frames = {view: self.input_handlers[view].read() for view in views}
+        for view in views:
+            self.capture_timestamps[view] = self.input_handlers[view].capture_time
         return frames
     
+    def _read_all_parallel(self):
+        """Read all views concurrently and keep the frame set within the skew tolerance"""
+        frames = self.read_views(list(self.input_handlers.keys()))
+        self.frame_sets += 1
+        
+        # Live views captured too long before the newest frame are re-read once
+        skew = self._skew(frames)
+        if skew > self.max_skew:
+            newest = max(self.capture_timestamps[v] for v, (ret, _) in frames.items() if ret)
+            lagging = [view for view, (ret, _) in frames.items()
+                       if ret and self.input_handlers[view].is_live
+                       and newest - self.capture_timestamps[view] > self.max_skew]
+            if lagging:
+                frames.update(self.read_views(lagging))
+                skew = self._skew(frames)
+            if skew > self.max_skew:
+                self.skew_violations += 1
+        
+        self.last_skew = skew
+        return frames
+    
+    def _skew(self, frames):
+        """Spread of capture times across views that returned a frame"""
+        times = [self.capture_timestamps[view] for view, (ret, _) in frames.items()
+                 if ret and self.capture_timestamps.get(view) is not None]
+        return max(times) - min(times) if len(times) > 1 else 0.0
+    
+    def get_capture_stats(self):
+        """Get capture synchronization statistics"""
+        return {
+            'parallel': self._executor is not None,
+            'frame_sets': self.frame_sets,
+            'last_skew_ms': self.last_skew * 1000,
+            'max_skew_ms': self.max_skew * 1000,
+            'skew_violations': self.skew_violations
+        }
+    
     def get_frame_sizes(self):
         """Get frame sizes for all inputs"""
         sizes = {}
@@ -241,6 +522,9 @@ class MultiInputHandler:
     
     def release_all(self):
         """Release all input handlers"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
         for handler in self.input_handlers.values():
             handler.release()
     
@@ -249,3 +533,175 @@ class MultiInputHandler:
         return list(self.input_handlers.keys())
 
 
+
+
+class FrameSynchronizer:
+    """Emits timestamp-aligned multi-view frame sets on top of a MultiInputHandler"""
+    
+    def __init__(self, multi_input, reference_view=SYNC_REFERENCE_VIEW, tolerance=SYNC_TOLERANCE,
+                 policy=SYNC_POLICY, buffer_size=SYNC_BUFFER_SIZE):
+        """
+        Initialize the synchronizer
+        
+        Args:
+            multi_input: MultiInputHandler providing the views
+            reference_view: View whose frames drive the output, or None for the slowest view
+            tolerance: Maximum timestamp difference (seconds) to the reference frame
+            policy: What to do when a view has no frame within tolerance:
+                    'drop' skips the whole frame set,
+                    'duplicate' repeats that view's previously emitted frame
+            buffer_size: Frames buffered per view while searching for the nearest timestamp
+        """
+        if policy not in ('drop', 'duplicate'):
+            raise ValueError(f"Unknown sync policy: {policy}")
+        
+        self.multi_input = multi_input
+        self.handlers = multi_input.input_handlers
+        self.tolerance = tolerance
+        self.policy = policy
+        self.buffer_size = max(2, int(buffer_size))
+        
+        if reference_view is None and self.handlers:
+            # Align to the slowest view so faster views are subsampled, not duplicated
+            reference_view = min(self.handlers, key=lambda v: self.handlers[v].get_fps())
+        self.reference_view = reference_view
+        
+        # Timestamps of all views must come from one clock: media time lines up files,
+        # but as soon as a live view is involved every view is aligned on capture time
+        self.media_time = all(not handler.is_live for handler in self.handlers.values())
+        
+        self.buffers = {view: deque() for view in self.handlers if view != reference_view}
+        self.finished = {view: False for view in self.handlers}
+        self.last_emitted = {}
+        self.last_reference_time = float('inf')
+        self.timestamps = {}
+        self.emitted_sets = 0
+        self.dropped_sets = 0
+        self.duplicated_frames = 0
+        self.discarded_frames = 0
+    
+    def _frame_time(self, view):
+        """Timestamp of the frame just read from a view on the synchronizer's clock"""
+        handler = self.handlers[view]
+        return handler.timestamp if self.media_time else handler.capture_time
+    
+    def _buffer_frames(self, frames):
+        """
+        Append frames read from non-reference views to their buffers
+        
+        Returns:
+            Views that returned no frame
+        """
+        missing = []
+        for view, (ret, frame) in frames.items():
+            handler = self.handlers[view]
+            if not ret or frame is None:
+                # Videos and images are exhausted; a live view just has nothing this round
+                self.finished[view] = handler.is_video or handler.is_finished()
+                missing.append(view)
+                continue
+            buffer = self.buffers[view]
+            buffer.append((self._frame_time(view), frame))
+            if len(buffer) > self.buffer_size:
+                buffer.popleft()
+                self.discarded_frames += 1
+        return missing
+    
+    def _fill_buffers(self, target_time):
+        """Read frames of the views until each has one at or past the target time"""
+        missing = set()
+        while True:
+            lagging = [view for view, buffer in self.buffers.items()
+                       if view not in missing and not self.finished[view]
+                       and (not buffer or buffer[-1][0] < target_time)]
+            if not lagging:
+                return
+            missing.update(self._buffer_frames(self.multi_input.read_views(lagging)))
+    
+    def _take_nearest(self, view, target_time):
+        """Pop the buffered frame nearest to the target time, discarding older ones"""
+        buffer = self.buffers[view]
+        if not buffer:
+            return None
+        
+        nearest = min(range(len(buffer)), key=lambda i: abs(buffer[i][0] - target_time))
+        for _ in range(nearest):
+            buffer.popleft()
+            self.discarded_frames += 1
+        timestamp, frame = buffer[0]
+        if abs(timestamp - target_time) > self.tolerance:
+            return None
+        buffer.popleft()
+        return timestamp, frame
+    
+    def read_all(self):
+        """
+        Read the next aligned frame set
+        
+        Returns:
+            Dict with view names as keys and (ret, frame) tuples as values
+        """
+        while True:
+            if self.reference_view not in self.handlers:
+                return {}
+            
+            # Read the reference frame together with the views that were behind the
+            # previous one, through the handler's (parallel) read path
+            views = [self.reference_view] + [
+                view for view, buffer in self.buffers.items()
+                if not self.finished[view] and (not buffer or buffer[-1][0] < self.last_reference_time)]
+            read = self.multi_input.read_views(views)
+            ret, ref_frame = read.pop(self.reference_view)
+            self._buffer_frames(read)
+            if not ret or ref_frame is None:
+                if self.handlers[self.reference_view].is_live:
+                    continue
+                return {view: (False, None) for view in self.handlers}
+            
+            ref_time = self._frame_time(self.reference_view)
+            self.last_reference_time = ref_time
+            self._fill_buffers(ref_time)
+            frames = {self.reference_view: (True, ref_frame)}
+            timestamps = {self.reference_view: ref_time}
+            matched = []
+            complete = True
+            
+            for view in self.buffers:
+                match = self._take_nearest(view, ref_time)
+                if match is not None:
+                    timestamps[view], frame = match
+                    frames[view] = (True, frame)
+                    matched.append(view)
+                elif self.policy == 'duplicate' and view in self.last_emitted:
+                    # Callers draw on the frames they get, so hand out a copy of the clean frame
+                    timestamps[view], frame = self.last_emitted[view]
+                    frames[view] = (True, frame.copy())
+                    self.duplicated_frames += 1
+                elif self.finished[view]:
+                    frames[view] = (False, None)
+                else:
+                    complete = False
+            
+            if not complete and self.policy == 'drop':
+                self.dropped_sets += 1
+                continue
+            
+            if self.policy == 'duplicate':
+                # Keep an unannotated copy, the emitted frame is drawn on downstream
+                for view in matched:
+                    self.last_emitted[view] = (timestamps[view], frames[view][1].copy())
+            for view in self.handlers:
+                frames.setdefault(view, (False, None))
+            self.timestamps = timestamps
+            self.emitted_sets += 1
+            return frames
+    
+    def get_stats(self):
+        """Get synchronization statistics"""
+        return {
+            'reference_view': self.reference_view,
+            'emitted_sets': self.emitted_sets,
+            'dropped_sets': self.dropped_sets,
+            'duplicated_frames': self.duplicated_frames,
+            'discarded_frames': self.discarded_frames
+        }
@@ -0,0 +1,121 @@
+"""
+Sparse Lucas-Kanade optical flow for propagating vehicle boxes between detector runs
+"""
+
+import cv2
+import numpy as np
+from config import (OPTICAL_FLOW_MAX_CORNERS, OPTICAL_FLOW_MIN_POINTS,
+                    OPTICAL_FLOW_WIN_SIZE, OPTICAL_FLOW_MAX_LEVEL)
+
+
+class FlowPropagator:
+    """Moves and rescales tracked bboxes using feature points tracked between frames"""
+
+    def __init__(self, max_corners=OPTICAL_FLOW_MAX_CORNERS, min_points=OPTICAL_FLOW_MIN_POINTS,
+                 win_size=OPTICAL_FLOW_WIN_SIZE, max_level=OPTICAL_FLOW_MAX_LEVEL):
+        """
+        Initialize the propagator
+
+        Args:
+            max_corners: Feature points sampled inside each bbox
+            min_points: Minimum successfully tracked points to move a bbox
+            win_size: Lucas-Kanade search window
+            max_level: Pyramid levels for Lucas-Kanade
+        """
+        self.max_corners = max_corners
+        self.min_points = min_points
+        self.lk_params = dict(
+            winSize=tuple(win_size),
+            maxLevel=max_level,
+            criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 20, 0.03)
+        )
+        self.prev_gray = None
+
+    def _to_gray(self, frame):
+        return cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+
+    def set_frame(self, frame):
+        """Remember a frame as the starting point for the next propagation"""
+        self.prev_gray = self._to_gray(frame)
+
+    def _sample_points(self, bbox):
+        """Pick good features to track inside a bbox of the previous frame"""
+        x, y, w, h = bbox
+        img_h, img_w = self.prev_gray.shape[:2]
+        x1, y1 = max(0, int(x)), max(0, int(y))
+        x2, y2 = min(img_w, int(x + w)), min(img_h, int(y + h))
+        if x2 - x1 < 4 or y2 - y1 < 4:
+            return None
+
+        points = cv2.goodFeaturesToTrack(self.prev_gray[y1:y2, x1:x2], self.max_corners,
+                                         qualityLevel=0.01, minDistance=3)
+        if points is None:
+            return None
+        points = points.reshape(-1, 2)
+        points[:, 0] += x1
+        points[:, 1] += y1
+        return points
+
+    def propagate(self, frame, bboxes):
+        """
+        Propagate bboxes from the previous frame to this one
+
+        Args:
+            frame: Current frame
+            bboxes: Dict of object_id -> (x, y, w, h) in the previous frame
+
+        Returns:
+            Dict of object_id -> propagated (x, y, w, h) for boxes with enough tracked points
+        """
+        gray = self._to_gray(frame)
+        if self.prev_gray is None or not bboxes:
+            self.prev_gray = gray
+            return {}
+
+        # Gather points of all boxes so Lucas-Kanade runs once per frame
+        owners = []
+        point_sets = []
+        for object_id, bbox in bboxes.items():
+            points = self._sample_points(bbox)
+            if points is not None and len(points) >= self.min_points:
+                owners.append((object_id, len(points)))
+                point_sets.append(points)
+
+        propagated = {}
+        if point_sets:
+            prev_points = np.concatenate(point_sets).astype(np.float32).reshape(-1, 1, 2)
+            next_points, status, _ = cv2.calcOpticalFlowPyrLK(self.prev_gray, gray, prev_points,
+                                                              None, **self.lk_params)
+            prev_points = prev_points.reshape(-1, 2)
+            next_points = next_points.reshape(-1, 2)
+            status = status.reshape(-1).astype(bool)
+
+            start = 0
+            for object_id, count in owners:
+                end = start + count
+                ok = status[start:end]
+                if np.count_nonzero(ok) >= self.min_points:
+                    propagated[object_id] = self._move_bbox(
+                        bboxes[object_id], prev_points[start:end][ok], next_points[start:end][ok])
+                start = end
+
+        self.prev_gray = gray
+        return propagated
+
+    def _move_bbox(self, bbox, prev_points, next_points):
+        """Shift a bbox by the median point motion and rescale it by the median spread change"""
+        x, y, w, h = bbox
+        dx, dy = np.median(next_points - prev_points, axis=0)
+
+        # Scale from the change in spread of the points around their centroid
+        prev_spread = np.linalg.norm(prev_points - np.median(prev_points, axis=0), axis=1)
+        next_spread = np.linalg.norm(next_points - np.median(next_points, axis=0), axis=1)
+        valid = prev_spread > 1.0
+        scale = float(np.median(next_spread[valid] / prev_spread[valid])) if valid.any() else 1.0
+        scale = min(max(scale, 0.8), 1.25)
+
+        cx = x + w / 2 + dx
+        cy = y + h / 2 + dy
+        new_w = max(1, int(round(w * scale)))
+        new_h = max(1, int(round(h * scale)))
+        return (int(cx - new_w / 2), int(cy - new_h / 2), new_w, new_h)
@@ -0,0 +1,227 @@
+"""
+Staged pipeline engine: stages run on their own threads, connected by bounded queues
+"""
+
+import queue
+import threading
+import time
+from config import PIPELINE_QUEUE_SIZE, PIPELINE_DROP_POLICY
+
+# End-of-stream marker passed down the stages
+END_OF_STREAM = object()
+
+DROP_POLICIES = ('block', 'drop-oldest', 'drop-newest')
+
+
+class StageQueue:
+    """Bounded queue between two stages with a policy for when it is full"""
+
+    def __init__(self, maxsize=PIPELINE_QUEUE_SIZE, drop_policy='block'):
+        """
+        Initialize the queue
+
+        Args:
+            maxsize: Maximum number of queued items
+            drop_policy: 'block' waits for the consumer (backpressure),
+                         'drop-oldest' discards the oldest queued item,
+                         'drop-newest' discards the item being put
+        """
+        if drop_policy not in DROP_POLICIES:
+            raise ValueError(f"Unknown drop policy: {drop_policy}")
+        self.queue = queue.Queue(maxsize=max(1, int(maxsize)))
+        self.drop_policy = drop_policy
+        self.puts = 0
+        self.drops = 0
+        self.blocked_time = 0.0
+        self.depth_sum = 0
+
+    def put(self, item, stop_event):
+        """
+        Put an item according to the drop policy
+
+        The end-of-stream marker is never dropped.
+
+        Returns:
+            False if the pipeline was stopped while waiting
+        """
+        self.depth_sum += self.queue.qsize()
+        if item is END_OF_STREAM or self.drop_policy == 'block':
+            start = time.perf_counter()
+            while not stop_event.is_set():
+                try:
+                    self.queue.put(item, timeout=0.1)
+                    self.blocked_time += time.perf_counter() - start
+                    self.puts += 1
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        try:
+            self.queue.put_nowait(item)
+        except queue.Full:
+            self.drops += 1
+            if self.drop_policy == 'drop-newest':
+                return True
+            try:
+                self.queue.get_nowait()
+            except queue.Empty:
+                pass
+            self.queue.put_nowait(item)
+        self.puts += 1
+        return True
+
+    def get(self, timeout=0.1):
+        """Get the next item, or None on timeout"""
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def get_stats(self):
+        """Get queue statistics"""
+        return {
+            'maxsize': self.queue.maxsize,
+            'drop_policy': self.drop_policy,
+            'puts': self.puts,
+            'drops': self.drops,
+            'avg_depth': self.depth_sum / (self.puts + self.drops) if self.puts + self.drops else 0.0,
+            'blocked_ms': self.blocked_time * 1000
+        }
+
+
+class PipelineStage(threading.Thread):
+    """Thread running one stage function on every item of its input queue"""
+
+    def __init__(self, name, func, input_queue, output_queue, stop_event):
+        """
+        Initialize the stage
+
+        Args:
+            name: Stage name (for statistics)
+            func: Called with each item; returns the item for the next stage, or None to drop it
+            input_queue: StageQueue to read from (None for the source stage)
+            output_queue: StageQueue to write to
+            stop_event: Event shared by all stages
+        """
+        super().__init__(name=f"stage-{name}", daemon=True)
+        self.stage_name = name
+        self.func = func
+        self.input_queue = input_queue
+        self.output_queue = output_queue
+        self.stop_event = stop_event
+        self.items = 0
+        self.busy_time = 0.0
+        self.error = None
+
+    def run(self):
+        try:
+            while not self.stop_event.is_set():
+                if self.input_queue is None:
+                    # Source stage: func() produces items, END_OF_STREAM when the input is done
+                    start = time.perf_counter()
+                    item = self.func()
+                else:
+                    item = self.input_queue.get()
+                    if item is None:
+                        continue
+                    if item is END_OF_STREAM:
+                        self.output_queue.put(END_OF_STREAM, self.stop_event)
+                        return
+                    start = time.perf_counter()
+                    item = self.func(item)
+                self.busy_time += time.perf_counter() - start
+
+                if item is None:
+                    continue
+                if item is END_OF_STREAM:
+                    self.output_queue.put(END_OF_STREAM, self.stop_event)
+                    return
+                self.items += 1
+                if not self.output_queue.put(item, self.stop_event):
+                    return
+        except Exception as e:
+            self.error = e
+            print(f"\nError in {self.stage_name} stage: {e}")
+            self.output_queue.put(END_OF_STREAM, self.stop_event)
+
+    def get_stats(self):
+        """Get stage statistics"""
+        return {
+            'items': self.items,
+            'busy_ms': self.busy_time * 1000,
+            'avg_ms': self.busy_time * 1000 / self.items if self.items else 0.0
+        }
+
+
+class Pipeline:
+    """
+    Chain of stages connected by bounded queues
+
+    Each stage runs on its own thread, so throughput approaches the slowest stage
+    instead of the sum of all stages. The consumer of the last stage (e.g. display,
+    which must stay on the main thread) pulls results with get().
+    """
+
+    def __init__(self, source, stages, queue_size=PIPELINE_QUEUE_SIZE,
+                 drop_policy=PIPELINE_DROP_POLICY):
+        """
+        Initialize the pipeline
+
+        Args:
+            source: Callable producing the next item, or END_OF_STREAM
+            stages: List of (name, func) tuples applied in order
+            queue_size: Capacity of every queue between stages
+            drop_policy: Policy of the queue after the source; the queues between
+                         later stages always block so no processed work is lost
+        """
+        self.stop_event = threading.Event()
+        self.queues = [StageQueue(queue_size, drop_policy)]
+        self.stages = [PipelineStage('capture', source, None, self.queues[0], self.stop_event)]
+        for name, func in stages:
+            output_queue = StageQueue(queue_size, 'block')
+            self.stages.append(PipelineStage(name, func, self.queues[-1], output_queue,
+                                             self.stop_event))
+            self.queues.append(output_queue)
+        self.output_queue = self.queues[-1]
+        self.start_time = None
+
+    def start(self):
+        """Start all stage threads"""
+        self.start_time = time.perf_counter()
+        for stage in self.stages:
+            stage.start()
+
+    def get(self, timeout=0.1):
+        """
+        Get the next result of the last stage
+
+        Returns:
+            The result, END_OF_STREAM when the input is done, or None on timeout
+        """
+        return self.output_queue.get(timeout)
+
+    def stop(self):
+        """Stop all stages and wait for their threads"""
+        self.stop_event.set()
+        for stage in self.stages:
+            stage.join(timeout=5.0)
+
+    def get_stats(self):
+        """Get per-stage and per-queue statistics"""
+        elapsed = time.perf_counter() - self.start_time if self.start_time else 0.0
+        return {
+            'elapsed': elapsed,
+            'stages': {stage.stage_name: stage.get_stats() for stage in self.stages},
+            'queues': [q.get_stats() for q in self.queues]
+        }
+
+    def print_stats(self):
+        """Print per-stage timings and queue behaviour"""
+        stats = self.get_stats()
+        for (name, stage), queue_stats in zip(stats['stages'].items(), stats['queues']):
+            print(f"Stage [{name}]: {stage['items']} items, avg {stage['avg_ms']:.1f} ms, "
+                  f"out queue avg depth {queue_stats['avg_depth']:.1f}/{queue_stats['maxsize']}, "
+                  f"{queue_stats['drops']} dropped ({queue_stats['drop_policy']})")
+        slowest = max(stats['stages'].items(), key=lambda kv: kv[1]['busy_ms'])
+        print(f"Pipeline: slowest stage '{slowest[0]}'")
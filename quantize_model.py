@@ -0,0 +1,122 @@
+"""
+Create a statically quantized INT8 detector from yolov8n.pt
+
+Calibrates activation ranges on frames sampled from our own footage, then
+writes an accuracy-vs-latency report comparing the INT8 model with the
+FP32 ONNX model and the original PyTorch weights.
+"""
+
+import argparse
+import json
+import os
+import time
+from config import *
+from benchmark import sample_frames, compare_detectors, print_comparison
+from vehicle_detector import TorchDetector, OnnxDetector, export_onnx_model, letterbox
+
+
+class FrameCalibrationReader:
+    """Feeds letterboxed video frames to the ONNX Runtime calibrator (CalibrationDataReader interface)"""
+
+    def __init__(self, frames, input_name, input_size=DETECTOR_INPUT_SIZE):
+        self.input_name = input_name
+        self.blobs = iter([letterbox(frame, input_size)[0] for frame in frames])
+
+    def get_next(self):
+        blob = next(self.blobs, None)
+        return None if blob is None else {self.input_name: blob}
+
+
+def _head_nodes(model_path, prefix):
+    """Names of graph nodes under the detection head, which are kept in FP32"""
+    import onnx
+
+    graph = onnx.load(model_path).graph
+    return [node.name for node in graph.node if node.name.startswith(prefix)]
+
+
+def quantize(fp32_path, int8_path, frames, exclude_head=True):
+    """
+    Statically quantize an ONNX model to INT8 (QDQ format)
+
+    Args:
+        fp32_path: Exported FP32 ONNX model
+        int8_path: Output path for the INT8 model
+        frames: Calibration frames
+        exclude_head: Keep the box/class decoding head in FP32 for accuracy
+    """
+    try:
+        import onnxruntime as ort
+        from onnxruntime.quantization import CalibrationMethod, QuantFormat, QuantType, quantize_static
+    except ImportError:
+        raise ImportError("onnxruntime and onnx are required for quantization: pip install onnxruntime onnx")
+
+    input_name = ort.InferenceSession(fp32_path, providers=['CPUExecutionProvider']).get_inputs()[0].name
+    reader = FrameCalibrationReader(frames, input_name)
+    nodes_to_exclude = _head_nodes(fp32_path, '/model.22/') if exclude_head else []
+
+    start = time.perf_counter()
+    quantize_static(
+        fp32_path, int8_path, reader,
+        quant_format=QuantFormat.QDQ,
+        activation_type=QuantType.QUInt8,
+        weight_type=QuantType.QInt8,
+        per_channel=True,
+        calibrate_method=CalibrationMethod.MinMax,
+        nodes_to_exclude=nodes_to_exclude,
+    )
+    print(f"Quantized model written to {int8_path} "
+          f"({len(frames)} calibration frames, {time.perf_counter() - start:.1f}s)")
+
+
+def main():
+    """Main entry point with command-line arguments"""
+    parser = argparse.ArgumentParser(description='Create and evaluate an INT8 detector')
+    parser.add_argument('--video', default='DEMO2.mp4', help='Footage to calibrate and evaluate on')
+    parser.add_argument('--model', default=MODEL_PATH, help='YOLOv8 weights')
+    parser.add_argument('--onnx', default=ONNX_MODEL_PATH, help='FP32 ONNX model (exported if missing)')
+    parser.add_argument('--output', default=ONNX_INT8_MODEL_PATH, help='INT8 model output path')
+    parser.add_argument('--calibration-frames', type=int, default=100, help='Frames used for calibration')
+    parser.add_argument('--eval-frames', type=int, default=50, help='Frames used for the report')
+    parser.add_argument('--keep-head-int8', action='store_true',
+                        help='Also quantize the detection head (faster, less accurate)')
+    parser.add_argument('--report', default='quantization_report.json', help='Report output path')
+    args = parser.parse_args()
+
+    onnx_path = args.onnx
+    if not os.path.isfile(onnx_path):
+        print(f"Exporting {args.model} to ONNX...")
+        onnx_path = export_onnx_model(args.model)
+
+    # Calibrate and evaluate on disjoint frames (even/odd samples, enough for the larger set)
+    frames = sample_frames(args.video, 2 * max(args.calibration_frames, args.eval_frames), stride=3)
+    calibration_frames = frames[0::2][:args.calibration_frames]
+    eval_frames = frames[1::2][:args.eval_frames]
+
+    quantize(onnx_path, args.output, calibration_frames, exclude_head=not args.keep_head_int8)
+
+    torch_detector = TorchDetector(args.model)
+    fp32_detector = OnnxDetector(onnx_path)
+    int8_detector = OnnxDetector(args.output)
+
+    report = {
+        'video': args.video,
+        'eval_frames': len(eval_frames),
+        'calibration_frames': len(calibration_frames),
+        'int8_vs_pytorch': compare_detectors(torch_detector, int8_detector, eval_frames),
+        'int8_vs_onnx_fp32': compare_detectors(fp32_detector, int8_detector, eval_frames),
+    }
+
+    print("\nINT8 vs PyTorch:")
+    print_comparison(report['int8_vs_pytorch'], 'pytorch', 'int8')
+    print("\nINT8 vs ONNX FP32:")
+    print_comparison(report['int8_vs_onnx_fp32'], 'fp32', 'int8')
+
+    with open(args.report, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nReport written to {args.report}")
+    print("Set DETECTOR_BACKEND = 'onnx-int8' in config.py to use the quantized model")
+
+
+if __name__ == "__main__":
+    main()
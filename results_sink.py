@@ -0,0 +1,168 @@
+"""
+Columnar results sink: per-vehicle rows in preallocated column buffers, flushed in chunks
+to Parquet or CSV
+"""
+
+import os
+import numpy as np
+import pandas as pd
+from config import RESULTS_CHUNK_ROWS
+from collision_detector import SEVERITIES
+
+_SEVERITY_CODES = {name: code for code, name in enumerate(SEVERITIES)}
+
+# Column name -> dtype of its buffer
+COLUMNS = {
+    'frame': np.int64,
+    'timestamp': np.float64,
+    'view': np.int16,       # Index into the sink's view names
+    'id': np.int64,
+    'x': np.float32,
+    'y': np.float32,
+    'vx': np.float32,
+    'vy': np.float32,
+    'speed': np.float32,
+    'distance': np.float32,
+    'angle': np.float32,
+    'collision': np.bool_,
+    'severity': np.int8,    # Index into SEVERITIES
+    'ttc': np.float32,      # inf when no collision course
+}
+
+
+class ColumnarResultsSink:
+    """
+    Accumulates one row per analyzed vehicle and writes them out chunk by chunk
+
+    Rows are written into fixed-size NumPy column buffers; when the buffers are full
+    they are flushed to the output file and reused, so memory stays bounded no matter
+    how long the run is. Parquet output appends one row group per chunk (requires
+    pyarrow), CSV output appends rows.
+    """
+
+    def __init__(self, path, chunk_rows=RESULTS_CHUNK_ROWS, file_format=None):
+        """
+        Initialize the sink
+
+        Args:
+            path: Output file (.parquet or .csv)
+            chunk_rows: Rows buffered before a flush
+            file_format: 'parquet' or 'csv', or None to pick from the file extension
+        """
+        if file_format is None:
+            file_format = 'parquet' if os.path.splitext(path)[1].lower() in ('.parquet', '.pq') else 'csv'
+        if file_format not in ('parquet', 'csv'):
+            raise ValueError(f"Unknown results format: {file_format}")
+        if file_format == 'parquet':
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                raise ImportError("pyarrow is required for Parquet results: pip install pyarrow")
+
+        self.path = path
+        self.file_format = file_format
+        self.chunk_rows = max(1, int(chunk_rows))
+        self.columns = {name: np.empty(self.chunk_rows, dtype=dtype) for name, dtype in COLUMNS.items()}
+        self.views = []
+        self._view_codes = {}
+        self.size = 0
+        self.rows_written = 0
+        self.chunks_written = 0
+        self.frames = 0
+        self._parquet_writer = None
+
+        # Start with an empty file, chunks are appended
+        if os.path.exists(path):
+            os.remove(path)
+
+    def _view_code(self, view):
+        code = self._view_codes.get(view)
+        if code is None:
+            code = self._view_codes[view] = len(self.views)
+            self.views.append(view)
+        return code
+
+    def write_frame(self, frame_number, timestamp, vehicles_info, alert_severity=None,
+                    alert_messages=None):
+        """
+        Append the vehicles of one frame (same interface as JsonLinesWriter)
+
+        Args:
+            frame_number: Frame number of the input
+            timestamp: Stream timestamp in seconds
+            vehicles_info: List of vehicle info dictionaries (all views)
+            alert_severity: Unused, the per-vehicle severity is stored instead
+            alert_messages: Unused
+        """
+        self.frames += 1
+        cols = self.columns
+        for vehicle in vehicles_info:
+            if self.size == self.chunk_rows:
+                self.flush()
+            i = self.size
+            x, y = vehicle['position']
+            vx, vy = vehicle['velocity']
+            cols['frame'][i] = frame_number
+            cols['timestamp'][i] = np.nan if timestamp is None else timestamp
+            cols['view'][i] = self._view_code(vehicle.get('view', 'main'))
+            cols['id'][i] = vehicle['id']
+            cols['x'][i] = x
+            cols['y'][i] = y
+            cols['vx'][i] = vx
+            cols['vy'][i] = vy
+            cols['speed'][i] = vehicle['speed']
+            cols['distance'][i] = vehicle['distance']
+            cols['angle'][i] = vehicle['angle']
+            cols['collision'][i] = vehicle.get('collision_detected', False)
+            cols['severity'][i] = _SEVERITY_CODES.get(vehicle.get('severity', 'none'), 0)
+            cols['ttc'][i] = vehicle.get('time_to_collision', np.inf)
+            self.size += 1
+
+    def _chunk_frame(self):
+        """Build a DataFrame from the filled part of the buffers"""
+        n = self.size
+        data = {name: column[:n] for name, column in self.columns.items()}
+        data['view'] = pd.Categorical.from_codes(data['view'], categories=self.views)
+        data['severity'] = pd.Categorical.from_codes(data['severity'], categories=SEVERITIES)
+        return pd.DataFrame(data)
+
+    def flush(self):
+        """Write the buffered rows to the output file and reuse the buffers"""
+        if self.size == 0:
+            return
+        df = self._chunk_frame()
+
+        if self.file_format == 'parquet':
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            # Store categoricals as plain strings so every row group has the same schema
+            df['view'] = df['view'].astype(str)
+            df['severity'] = df['severity'].astype(str)
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self._parquet_writer is None:
+                self._parquet_writer = pq.ParquetWriter(self.path, table.schema)
+            self._parquet_writer.write_table(table)
+        else:
+            df.to_csv(self.path, mode='a', header=self.chunks_written == 0, index=False)
+
+        self.rows_written += self.size
+        self.chunks_written += 1
+        self.size = 0
+
+    def close(self):
+        """Flush the remaining rows and close the output file"""
+        self.flush()
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+            self._parquet_writer = None
+
+    def get_stats(self):
+        """Get sink statistics"""
+        return {
+            'frames': self.frames,
+            'rows_written': self.rows_written,
+            'chunks_written': self.chunks_written,
+            'chunk_rows': self.chunk_rows
+        }
+
@@ -0,0 +1,75 @@
+"""
+Per-frame results output for headless runs
+"""
+
+import json
+import math
+import os
+import numpy as np
+
+
+def to_builtin(value):
+    """Convert NumPy values (e.g. Kalman state entries) to plain Python for serialization"""
+    if isinstance(value, np.ndarray):
+        return value.item() if value.size == 1 else [to_builtin(v) for v in value.tolist()]
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not math.isfinite(value):
+        return None  # e.g. no time to collision
+    if isinstance(value, (list, tuple)):
+        return [to_builtin(v) for v in value]
+    if isinstance(value, dict):
+        return {k: to_builtin(v) for k, v in value.items()}
+    return value
+
+
+class JsonLinesWriter:
+    """Writes one JSON object per processed frame"""
+
+    def __init__(self, path):
+        """
+        Open the results file
+
+        Args:
+            path: Output path (.jsonl)
+        """
+        self.path = path
+        self.file = open(path, 'w')
+        self.frames = 0
+
+    def write_frame(self, frame_number, timestamp, vehicles_info, alert_severity=None,
+                    alert_messages=None):
+        """
+        Write the results of one frame
+
+        Args:
+            frame_number: Frame number of the input
+            timestamp: Stream timestamp in seconds
+            vehicles_info: List of vehicle info dictionaries (all views)
+            alert_severity: Highest alert severity, or None if no alert was raised
+            alert_messages: Alert messages of the frame
+        """
+        record = {
+            'frame': frame_number,
+            'timestamp': timestamp,
+            'vehicles': vehicles_info,
+            'alert': alert_severity,
+            'alert_messages': alert_messages or []
+        }
+        self.file.write(json.dumps(to_builtin(record)) + '\n')
+        self.frames += 1
+
+    def close(self):
+        """Flush and close the results file"""
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+def create_results_writer(path):
+    """Create the results writer matching the file extension (.jsonl, .csv or .parquet)"""
+    if os.path.splitext(path)[1].lower() in ('.parquet', '.pq', '.csv'):
+        # Imported here so JSON-lines output does not need pandas
+        from results_sink import ColumnarResultsSink
+        return ColumnarResultsSink(path)
+    return JsonLinesWriter(path)
@@ -7,19 +7,30 @@ import cv2
 import numpy as np
 import sys
 import argparse
-from ultralytics import YOLO
 import time
 from config import *
 from vehicle_tracker import VehicleTracker
 from collision_detector import CollisionDetector
 from alert_system import AlertSystem
-from input_handler import InputHandler, MultiInputHandler
+from input_handler import InputHandler, MultiInputHandler, FrameSynchronizer
+from detection_decoder import to_bbox_list
+from vehicle_detector import create_detector
+from detection_scheduler import DetectionScheduler, MotionGate
+from optical_flow import FlowPropagator
+from view_workers import ViewWorkerPool
+from pipeline import Pipeline, END_OF_STREAM
+from results_writer import create_results_writer
+from detection_cache import DetectionCache
 
 
 class VehicleCollisionDetectionSystem:
     """Main system class for collision detection with flexible input support"""
     
-    def __init__(self, input_source=None, input_type='auto', multi_view=False):
+    def __init__(self, input_source=None, input_type='auto', multi_view=False,
+                 multi_process=MULTI_PROCESS_VIEWS, view_name='main',
+                 sound_enabled=ALERT_SOUND_ENABLED, input_handler=None,
+                 pipeline=PIPELINE_MODE, headless=False,
+                 detection_cache=DETECTION_CACHE_ENABLED):
         """
         Initialize the collision detection system
         
@@ -27,37 +38,84 @@ class VehicleCollisionDetectionSystem:
             input_source: Single input source (image/video/camera) or None for multi-view
             input_type: 'image', 'video', 'live', or 'auto'
             multi_view: If True, use multi-view mode from config
+            multi_process: Multi-view only: process each view in its own worker process
+            view_name: View name used for a single input (e.g. 'front' inside a view worker)
+            sound_enabled: Play alert sounds
+            input_handler: Ready-made single-input handler (e.g. a SharedFrameReader)
+            pipeline: Run read/detect/track/render as overlapping pipeline stages
+            headless: Batch mode without window, drawing or sound (see run_headless)
+            detection_cache: Video files only: reuse detections cached on disk by an earlier run
         """
+        self.multi_view = multi_view
+        self.use_pipeline = pipeline
+        self.headless = headless
+        if headless:
+            sound_enabled = False
+        self.worker_pool = None
+        if multi_view and multi_process:
+            # Workers own the inputs, detector and trackers; the parent only alerts and displays
+            self.worker_pool = ViewWorkerPool(CAMERA_SOURCES)
+            self.views = self.worker_pool.views
+            self.alert_system = AlertSystem(sound_enabled)
+            print("System initialized successfully!")
+            print(f"Mode: Multi-view ({len(self.views)} worker processes)")
+            return
+        
         # Load YOLOv8 model
-        print("Loading YOLOv8 model...")
-        self.model = YOLO('yolov8n.pt')
+        print(f"Loading YOLOv8 model ({DETECTOR_BACKEND} backend)...")
+        self.detector = create_detector(DETECTOR_BACKEND)
         
         # Initialize input handler
-        self.multi_view = multi_view
-        if multi_view or (input_source is None and SINGLE_INPUT_MODE is None):
+        if input_handler is not None:
+            # Frames come from elsewhere, e.g. a capture process through shared memory
+            self.input_handler = input_handler
+            self.views = [view_name]
+            self.frame_sizes = {view_name: self.input_handler.get_frame_size()}
+        elif multi_view or (input_source is None and SINGLE_INPUT_MODE is None):
             # Multi-view mode
             self.input_handler = MultiInputHandler(CAMERA_SOURCES)
             self.views = self.input_handler.get_available_views()
             self.frame_sizes = self.input_handler.get_frame_sizes()
+            # Optionally align views running at different frame rates on their timestamps
+            self.frame_source = (FrameSynchronizer(self.input_handler) if MULTI_VIEW_SYNC
+                                 else self.input_handler)
         else:
             # Single input mode
             source = input_source if input_source is not None else SINGLE_INPUT_MODE
             self.input_handler = InputHandler(source, input_type)
-            self.views = ['main']
-            # Get frame size
-            if self.input_handler.is_image:
-                h, w = self.input_handler.image.shape[:2]
-                self.frame_sizes = {'main': (w, h)}
-            else:
-                w = int(self.input_handler.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-                h = int(self.input_handler.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-                self.frame_sizes = {'main': (w, h)}
+            self.views = [view_name]
+            self.frame_sizes = {view_name: self.input_handler.get_frame_size()}
+        
+        # Initialize detection cache (replays of the same video skip inference)
+        self.detection_cache = None
+        if detection_cache and not self.multi_view and self.input_handler.is_video \
+                and getattr(self.input_handler, 'input_source', None) is not None:
+            self.detection_cache = DetectionCache(self.input_handler.input_source,
+                                                  self.detector.get_settings())
         
         # Initialize trackers
         self.trackers = {}
         for view in self.views:
             self.trackers[view] = VehicleTracker()
         
+        # Initialize detection schedulers (detect every N frames, track in between)
+        self.schedulers = {}
+        for view in self.views:
+            self.schedulers[view] = DetectionScheduler()
+        
+        # Initialize motion gates (reuse detections on static frames)
+        self.motion_gates = {}
+        self.last_detections = {}
+        if MOTION_GATE_ENABLED:
+            for view in self.views:
+                self.motion_gates[view] = MotionGate()
+        
+        # Initialize optical flow propagators (move bboxes between detector runs)
+        self.flow_propagators = {}
+        if OPTICAL_FLOW_ENABLED:
+            for view in self.views:
+                self.flow_propagators[view] = FlowPropagator()
+        
         # Initialize collision detectors
         self.collision_detectors = {}
         for view in self.views:
@@ -65,58 +123,186 @@ class VehicleCollisionDetectionSystem:
             self.collision_detectors[view] = CollisionDetector(w, h)
         
         # Initialize alert system
-        self.alert_system = AlertSystem()
+        self.alert_system = AlertSystem(sound_enabled)
         
         print("System initialized successfully!")
         print(f"Mode: {'Multi-view' if self.multi_view else 'Single input'}")
         print(f"Input type: {self.input_handler.input_type if not self.multi_view else 'Multiple'}")
     
-    def _detect_vehicles(self, frame, view='main'):
-        """Detect vehicles in a frame using YOLOv8"""
-        if self.model is None:
+    def _detect_vehicles(self, frame, view='main', frame_index=None):
+        """
+        Detect vehicles in a frame using YOLOv8
+        
+        Args:
+            frame: Frame to detect in
+            view: View name
+            frame_index: Frame number in the input, used to look up the detection cache
+        """
+        cache = self.detection_cache if frame_index is not None else None
+        if cache is not None:
+            detections = cache.get(frame_index)
+            if detections is not None:
+                return to_bbox_list(detections)
+        
+        if self.detector is None:
             return []
         
         try:
-            results = self.model(frame, conf=CONFIDENCE_THRESHOLD, iou=IOU_THRESHOLD, verbose=False)
-            
-            detections = []
-            for result in results:
-                if result.boxes is not None and len(result.boxes) > 0:
-                    boxes = result.boxes
-                    for box in boxes:
-                        cls = int(box.cls[0])
-                        conf = float(box.conf[0])
-                        
-                        # Check if it's a vehicle class
-                        if cls in VEHICLE_CLASSES:
-                            x1, y1, x2, y2 = box.xyxy[0].cpu().numpy()
-                            x, y, w, h = int(x1), int(y1), int(x2 - x1), int(y2 - y1)
-                            
-                            # Ensure valid bounding box
-                            if w > 0 and h > 0 and x >= 0 and y >= 0:
-                                detections.append((x, y, w, h))
-            
-            return detections
+            detections = self.detector.detect(frame)
+            if cache is not None:
+                cache.put(frame_index, detections)
+            return to_bbox_list(detections)
         except Exception as e:
             print(f"Error in vehicle detection: {e}")
             return []
     
-    def _process_view(self, frame, view='main'):
-        """Process a single frame"""
+    def _detect_vehicles_batch(self, frames):
+        """
+        Detect vehicles in several views with a single YOLOv8 call
+        
+        Args:
+            frames: Dict with view names as keys and frames as values
+        
+        Returns:
+            Dict with view names as keys and detection lists as values
+        """
+        if self.detector is None or not frames:
+            return {view: [] for view in frames}
+        
+        views = list(frames.keys())
+        try:
+            # One forward pass for the whole batch, results come back in input order
+            batch = self.detector.detect_batch([frames[view] for view in views])
+            return {view: to_bbox_list(detections) for view, detections in zip(views, batch)}
+        except Exception as e:
+            print(f"Error in batched vehicle detection: {e}")
+            return {view: [] for view in views}
+    
+    def _process_view(self, frame, view='main', detections=None, scheduled=False):
+        """
+        Process a single frame
+        
+        Args:
+            frame: Frame to process
+            view: View name
+            detections: Precomputed detections (e.g. from a batched call), or None to let
+                        the view's scheduler decide whether to detect here
+            scheduled: The caller already made this frame's scheduling decision
+                       (_detect_views), so None detections mean a tracker-only frame
+        """
         if frame is None:
             return None, []
         
-        # Detect vehicles
-        detections = self._detect_vehicles(frame, view)
+        if not scheduled:
+            frame_index = None if self.multi_view else self.input_handler.get_frame_number()
+            detections = self._schedule_detection(frame, view, detections, frame_index)
+        detections, tracked_vehicles, vehicles_info = self._track_and_analyze(frame, view, detections)
+        
+        # Draw detections and information
+        frame = self._draw_detections(frame, detections, tracked_vehicles, vehicles_info, view)
+        
+        return frame, vehicles_info
+    
+    def _schedule_detection(self, frame, view, detections=None, frame_index=None):
+        """
+        Detect vehicles if the view's scheduler says so (frame_index: see _detect_vehicles)
+        
+        Returns:
+            Detection list, or None on tracker-only frames
+        """
+        if detections is not None:
+            return detections
+        scheduler = self.schedulers[view]
+        if not scheduler.should_detect():
+            # Counted with the decision, so the next decision sees this skip
+            scheduler.record_skip()
+            return None
+        detections = self._reuse_static_detections(frame, view)
+        if detections is None:
+            start = time.perf_counter()
+            detections = self._detect_vehicles(frame, view, frame_index)
+            scheduler.record_detection(time.perf_counter() - start)
+            self.last_detections[view] = detections
+        return detections
+    
+    def _detect_views(self, frames, frame_index=None):
+        """
+        Run detection for all scheduled, non-static views (in one model call when batching)
+        
+        Args:
+            frames: Dict with view names as keys and frames as values
+            frame_index: Single input only: frame number for the detection cache
+        
+        Returns:
+            Dict with view names as keys and detection lists as values; views on
+            tracker-only frames are missing (their skips are already recorded)
+        """
+        batch_detections = {}
+        detect_frames = {}
+        for view, frame in frames.items():
+            if not self.schedulers[view].should_detect():
+                # Counted here rather than in the tracking stage, which may run on
+                # another thread after the next frames were already scheduled
+                self.schedulers[view].record_skip()
+                continue
+            reused = self._reuse_static_detections(frame, view)
+            if reused is not None:
+                batch_detections[view] = reused
+            else:
+                detect_frames[view] = frame
+        
+        if BATCHED_INFERENCE and len(detect_frames) > 1:
+            start = time.perf_counter()
+            detected = self._detect_vehicles_batch(detect_frames)
+            latency = (time.perf_counter() - start) / len(detect_frames)
+            for view in detect_frames:
+                self.schedulers[view].record_detection(latency)
+            self.last_detections.update(detected)
+            batch_detections.update(detected)
+        elif detect_frames:
+            for view, frame in detect_frames.items():
+                start = time.perf_counter()
+                batch_detections[view] = self._detect_vehicles(frame, view, frame_index)
+                self.schedulers[view].record_detection(time.perf_counter() - start)
+                self.last_detections[view] = batch_detections[view]
+        return batch_detections
+    
+    def _track_and_analyze(self, frame, view, detections):
+        """
+        Update the view's tracker and analyze every tracked vehicle
         
-        # Update tracker
-        w, h = self.frame_sizes[view]
-        self.trackers[view].update(detections, (w/2, h/2))
+        Args:
+            frame: Current frame
+            view: View name
+            detections: Detection list, or None on tracker-only frames
+        
+        Returns:
+            (detections, tracked_vehicles, vehicles_info)
+        """
+        # Update tracker (motion model or optical flow on frames without detections)
+        flow = self.flow_propagators.get(view)
+        if detections is None:
+            flow_bboxes = None
+            if flow is not None:
+                flow_bboxes = flow.propagate(frame, self.trackers[view].get_active_bboxes())
+            self.trackers[view].predict(flow_bboxes)
+            detections = []
+        else:
+            w, h = self.frame_sizes[view]
+            self.trackers[view].update(detections, (w/2, h/2))
+            if flow is not None:
+                flow.set_frame(frame)
         
         # Get tracked vehicles
         tracked_vehicles = self.trackers[view].get_tracked_vehicles()
         
-        # Analyze each tracked vehicle
+        # Analyze tracked vehicles, in one vectorized batch when there are many of them
+        if len(tracked_vehicles) >= COLLISION_BATCH_MIN_VEHICLES:
+            vehicles_info = self.collision_detectors[view].analyze_tracked_vehicles(tracked_vehicles, view)
+            for vehicle_info in vehicles_info:
+                vehicle_info['view'] = view
+            return detections, tracked_vehicles, vehicles_info
+        
         vehicles_info = []
         for vehicle_tracker_info in tracked_vehicles:
             bbox = vehicle_tracker_info.get('bbox', None)
@@ -130,10 +316,20 @@ class VehicleCollisionDetectionSystem:
             vehicle_info['view'] = view
             vehicles_info.append(vehicle_info)
         
-        # Draw detections and information
-        frame = self._draw_detections(frame, detections, tracked_vehicles, vehicles_info, view)
+        return detections, tracked_vehicles, vehicles_info
+    
+    def _reuse_static_detections(self, frame, view):
+        """
+        Return the previous detections if the motion gate finds the scene static, else None
+        """
+        gate = self.motion_gates.get(view)
+        if gate is None:
+            return None
         
-        return frame, vehicles_info
+        if gate.is_static(frame) and view in self.last_detections:
+            self.schedulers[view].record_detection()
+            return self.last_detections[view]
+        return None
     
     def _draw_text_with_background(self, frame, text, position, font_scale=0.6, thickness=2, 
                                    text_color=(255, 255, 255), bg_color=(0, 0, 0), alpha=0.7):
@@ -165,7 +361,8 @@ class VehicleCollisionDetectionSystem:
         
         return frame
     
-    def _draw_detections(self, frame, detections, tracked_vehicles, vehicles_info, view):
+    def _draw_detections(self, frame, detections, tracked_vehicles, vehicles_info, view,
+                         frame_number=None):
         """Draw detections, tracks, and information on frame"""
         h, w = frame.shape[:2]
         
@@ -244,7 +441,9 @@ class VehicleCollisionDetectionSystem:
             if props['is_image']:
                 view_label += " - IMAGE"
             elif props['is_video']:
-                view_label += f" - VIDEO (Frame {self.input_handler.get_frame_number()}/{self.input_handler.get_total_frames()})"
+                if frame_number is None:
+                    frame_number = self.input_handler.get_frame_number()
+                view_label += f" - VIDEO (Frame {frame_number}/{self.input_handler.get_total_frames()})"
             elif props['is_live']:
                 view_label += " - LIVE"
         
@@ -255,6 +454,13 @@ class VehicleCollisionDetectionSystem:
     
     def run(self):
         """Main processing loop"""
+        if self.worker_pool is not None:
+            self._run_worker_pool()
+            return
+        if self.use_pipeline:
+            self._run_pipeline()
+            return
+        
         print("Starting collision detection system...")
         print("Press 'q' to quit, 'p' to pause (video only), 'r' to reset (video/image only)")
         
@@ -266,16 +472,22 @@ class VehicleCollisionDetectionSystem:
             if not paused:
                 # Read frames
                 if self.multi_view:
-                    frames_data = self.input_handler.read_all()
+                    frames_data = self.frame_source.read_all()
                     all_vehicles_info = []
                     processed_frames = {}
                     
-                    for view, (ret, frame) in frames_data.items():
-                        if ret and frame is not None:
-                            processed_frame, vehicles_info = self._process_view(frame, view)
-                            if processed_frame is not None:
-                                processed_frames[view] = processed_frame
-                                all_vehicles_info.extend(vehicles_info)
+                    valid_frames = {view: frame for view, (ret, frame) in frames_data.items()
+                                    if ret and frame is not None}
+                    
+                    # Run detection for all scheduled, non-static views in one model call
+                    batch_detections = self._detect_views(valid_frames)
+                    
+                    for view, frame in valid_frames.items():
+                        processed_frame, vehicles_info = self._process_view(
+                            frame, view, batch_detections.get(view), scheduled=True)
+                        if processed_frame is not None:
+                            processed_frames[view] = processed_frame
+                            all_vehicles_info.extend(vehicles_info)
                     
                     # Check for alerts
                     should_alert, severity, messages = self.alert_system.check_alerts(all_vehicles_info)
@@ -312,7 +524,7 @@ class VehicleCollisionDetectionSystem:
                         continue
                     
                     # Process frame
-                    processed_frame, vehicles_info = self._process_view(frame, 'main')
+                    processed_frame, vehicles_info = self._process_view(frame, self.views[0])
                     
                     if processed_frame is not None:
                         # Check for alerts
@@ -348,6 +560,199 @@ class VehicleCollisionDetectionSystem:
         
         self.cleanup()
     
+    def _run_worker_pool(self):
+        """Multi-view loop with each view processed in its own worker process"""
+        print("Starting collision detection system with view workers...")
+        print("Press 'q' to quit")
+        
+        last_alert_time = 0
+        alert_interval = 0.5
+        self.worker_pool.start()
+        
+        try:
+            while True:
+                results = self.worker_pool.read_all()
+                if self.worker_pool.all_finished():
+                    print("All inputs finished.")
+                    break
+                
+                # Only compact vehicle records and downscaled frames come back from workers
+                frames = {}
+                all_vehicles_info = []
+                for view, (ret, frame, vehicles_info) in results.items():
+                    if ret:
+                        all_vehicles_info.extend(vehicles_info)
+                        if frame is not None:
+                            frames[view] = frame
+                
+                # Check for alerts
+                should_alert, severity, messages = self.alert_system.check_alerts(all_vehicles_info)
+                current_time = time.time()
+                if should_alert and (current_time - last_alert_time) > alert_interval:
+                    self.alert_system.play_alert_sound()
+                    last_alert_time = current_time
+                
+                # Display frames
+                if frames:
+                    self._display_multi_view(frames, all_vehicles_info)
+                
+                key = cv2.waitKey(1) & 0xFF
+                if key == ord('q'):
+                    break
+        finally:
+            self.worker_pool.stop()
+            cv2.destroyAllWindows()
+            print("System stopped.")
+    
+    def _read_pipeline_frames(self):
+        """Pipeline source: read the next frame (set) as a dict of view -> frame"""
+        if self.multi_view:
+            frames_data = self.frame_source.read_all()
+            if all(not ret for ret, _ in frames_data.values()):
+                return END_OF_STREAM
+            frames = {view: frame for view, (ret, frame) in frames_data.items()
+                      if ret and frame is not None}
+            return {'frames': frames, 'frame_number': None} if frames else None
+        
+        ret, frame = self.input_handler.read()
+        if not ret or frame is None:
+            return END_OF_STREAM if self.input_handler.is_finished() else None
+        # The pipeline keeps several frames in flight, so own the pixels of this one
+        if frame.base is not None:
+            frame = frame.copy()
+        return {'frames': {self.views[0]: frame},
+                'frame_number': self.input_handler.get_frame_number()}
+    
+    def _pipeline_detect(self, item):
+        """Pipeline stage: scheduled (batched) detection"""
+        item['detections'] = self._detect_views(item['frames'], item['frame_number'])
+        return item
+    
+    def _pipeline_track(self, item):
+        """Pipeline stage: tracking and collision analysis"""
+        item['tracks'] = {}
+        for view, frame in item['frames'].items():
+            item['tracks'][view] = self._track_and_analyze(frame, view, item['detections'].get(view))
+        return item
+    
+    def _pipeline_render(self, item):
+        """Pipeline stage: alert check and drawing"""
+        all_vehicles_info = []
+        for view, (detections, tracked_vehicles, vehicles_info) in item['tracks'].items():
+            frame = self._draw_detections(item['frames'][view], detections, tracked_vehicles,
+                                          vehicles_info, view, item['frame_number'])
+            item['frames'][view] = self.alert_system.draw_alert_overlay(frame, vehicles_info)
+            all_vehicles_info.extend(vehicles_info)
+        item['vehicles_info'] = all_vehicles_info
+        item['should_alert'] = self.alert_system.check_alerts(all_vehicles_info)[0]
+        return item
+    
+    def _run_pipeline(self):
+        """Processing loop with read, detect, track and render overlapping on stage threads"""
+        print("Starting collision detection system (pipelined)...")
+        print("Press 'q' to quit")
+        
+        pipeline = Pipeline(self._read_pipeline_frames, [
+            ('detect', self._pipeline_detect),
+            ('track', self._pipeline_track),
+            ('render', self._pipeline_render),
+        ])
+        last_alert_time = 0
+        alert_interval = 0.5
+        pipeline.start()
+        
+        try:
+            # Display stays on the main thread (required by most GUI backends)
+            while True:
+                item = pipeline.get()
+                if item is END_OF_STREAM:
+                    print("\nInput finished.")
+                    break
+                
+                if item is not None:
+                    current_time = time.time()
+                    if item['should_alert'] and (current_time - last_alert_time) > alert_interval:
+                        self.alert_system.play_alert_sound()
+                        last_alert_time = current_time
+                    
+                    vehicles_info = item['vehicles_info']
+                    if self.multi_view:
+                        self._display_multi_view(item['frames'], vehicles_info)
+                    else:
+                        cv2.imshow('Vehicle Collision Detection', item['frames'][self.views[0]])
+                        collision_count = sum(1 for v in vehicles_info if v.get('collision_detected', False))
+                        print(f"\rFrame {item['frame_number']}: "
+                              f"Vehicles: {len(vehicles_info)}, Collision Risks: {collision_count}", end='')
+                
+                key = cv2.waitKey(1) & 0xFF
+                if key == ord('q'):
+                    break
+        finally:
+            pipeline.stop()
+            print()
+            pipeline.print_stats()
+            self.cleanup()
+    
+    def run_headless(self, results_path=HEADLESS_RESULTS_PATH, writer=None):
+        """
+        Process the input as fast as possible without display or drawing
+        
+        Writes per-frame vehicle info and alerts to a results file and prints end-to-end FPS.
+        
+        Args:
+            results_path: Output file: .jsonl (one object per frame), or .csv/.parquet
+                          (one row per vehicle, written in chunks)
+            writer: Object with write_frame()/close() to use instead of a results file writer
+        """
+        print(f"Processing headless, writing results to {results_path}...")
+        writer = writer or create_results_writer(results_path)
+        processed = 0
+        start = time.perf_counter()
+        
+        try:
+            while True:
+                if self.multi_view:
+                    frames_data = self.frame_source.read_all()
+                    if all(not ret for ret, _ in frames_data.values()):
+                        break
+                    frames = {view: frame for view, (ret, frame) in frames_data.items()
+                              if ret and frame is not None}
+                    frame_number = processed + 1
+                    handlers = self.input_handler.input_handlers
+                    timestamp = min((handlers[view].timestamp for view in frames), default=None)
+                else:
+                    ret, frame = self.input_handler.read()
+                    if not ret or frame is None:
+                        if self.input_handler.is_finished():
+                            break
+                        continue
+                    frames = {self.views[0]: frame}
+                    frame_number = self.input_handler.get_frame_number()
+                    timestamp = self.input_handler.timestamp
+                
+                detections = self._detect_views(frames, None if self.multi_view else frame_number)
+                all_vehicles_info = []
+                for view, frame in frames.items():
+                    _, _, vehicles_info = self._track_and_analyze(frame, view, detections.get(view))
+                    all_vehicles_info.extend(vehicles_info)
+                
+                should_alert, severity, messages = self.alert_system.check_alerts(all_vehicles_info)
+                writer.write_frame(frame_number, timestamp, all_vehicles_info,
+                                   severity if should_alert else None, messages)
+                processed += 1
+                if processed % 100 == 0:
+                    elapsed = time.perf_counter() - start
+                    print(f"\rFrames: {processed}, FPS: {processed / elapsed:.1f}", end='')
+        except KeyboardInterrupt:
+            print("\nInterrupted")
+        finally:
+            writer.close()
+            elapsed = time.perf_counter() - start
+            print(f"\nProcessed {processed} frames in {elapsed:.2f}s "
+                  f"({processed / elapsed if elapsed > 0 else 0.0:.1f} FPS end-to-end)")
+            print(f"Results written to {results_path}")
+            self.cleanup()
+    
     def _display_multi_view(self, frames, all_vehicles_info):
         """Display multiple views in a grid"""
         views = ['front', 'back', 'left', 'right']
@@ -387,12 +792,48 @@ class VehicleCollisionDetectionSystem:
     def cleanup(self):
         """Clean up resources"""
         print("\nCleaning up...")
+        for view, scheduler in getattr(self, 'schedulers', {}).items():
+            stats = scheduler.get_stats()
+            print(f"Detection [{view}]: {stats['detected_frames']} detected, "
+                  f"{stats['skipped_frames']} tracker-only frames, interval {stats['interval']}, "
+                  f"avg latency {stats['avg_latency_ms']:.1f} ms")
+        if getattr(self, 'detection_cache', None) is not None:
+            self.detection_cache.save()
+            stats = self.detection_cache.get_stats()
+            print(f"Detection cache: {stats['hits']} hits, {stats['misses']} misses "
+                  f"({stats['hit_rate'] * 100:.1f}%), {stats['path']}")
+        for view, gate in getattr(self, 'motion_gates', {}).items():
+            stats = gate.get_stats()
+            print(f"Motion gate [{view}]: {stats['hits']}/{stats['checks']} frames reused "
+                  f"({stats['hit_rate'] * 100:.1f}%), threshold {stats['threshold']}")
         if hasattr(self, 'input_handler'):
+            handlers = (self.input_handler.input_handlers if self.multi_view
+                        else {self.views[0]: self.input_handler})
+            for view, handler in handlers.items():
+                stats = handler.get_prefetch_stats()
+                if stats is not None:
+                    print(f"Prefetch [{view}]: avg queue depth {stats['avg_queue_depth']:.1f}/"
+                          f"{stats['queue_size']}, avg decode wait {stats['avg_decode_wait_ms']:.1f} ms")
+                stats = handler.get_live_stats()
+                if stats is not None:
+                    print(f"Live capture [{view}]: {stats['dropped_frames']}/{stats['captured_frames']} "
+                          f"frames dropped, avg frame age {stats['avg_frame_age_ms']:.1f} ms")
             if self.multi_view:
+                stats = self.input_handler.get_capture_stats()
+                if stats['parallel']:
+                    print(f"Parallel capture: {stats['frame_sets']} frame sets, "
+                          f"{stats['skew_violations']} over {stats['max_skew_ms']:.0f} ms skew")
+                if isinstance(self.frame_source, FrameSynchronizer):
+                    stats = self.frame_source.get_stats()
+                    print(f"Frame sync (reference: {stats['reference_view']}): "
+                          f"{stats['emitted_sets']} sets, {stats['dropped_sets']} dropped, "
+                          f"{stats['duplicated_frames']} duplicated, "
+                          f"{stats['discarded_frames']} out-of-sync frames skipped")
                 self.input_handler.release_all()
             else:
                 self.input_handler.release()
-        cv2.destroyAllWindows()
+        if not self.headless:
+            cv2.destroyAllWindows()
         print("System stopped.")
 
 
@@ -414,6 +855,15 @@ Examples:
   
   # Multi-view mode (uses config.py settings)
   python run_detection.py --multi-view
+  
+  # Multi-view mode with one worker process per view
+  python run_detection.py --multi-view --workers
+  
+  # Video file with read/detect/track/render running as pipeline stages
+  python run_detection.py --input video.mp4 --pipeline
+  
+  # Process a video as fast as possible, results to a file, no window
+  python run_detection.py --input video.mp4 --headless --results results.jsonl
         """
     )
     
@@ -423,6 +873,16 @@ Examples:
                        default='auto', help='Input type (default: auto-detect)')
     parser.add_argument('--multi-view', '-m', action='store_true',
                        help='Use multi-view mode from config.py')
+    parser.add_argument('--workers', '-w', action='store_true',
+                       help='Multi-view: process each view in its own worker process')
+    parser.add_argument('--pipeline', action='store_true',
+                       help='Run read/detect/track/render as overlapping pipeline stages')
+    parser.add_argument('--cache', action='store_true',
+                       help='Video files: cache detections on disk and reuse them on re-runs')
+    parser.add_argument('--headless', action='store_true',
+                       help='Batch mode: no window or drawing, write results to a file and print FPS')
+    parser.add_argument('--results', '-o', type=str, default=HEADLESS_RESULTS_PATH,
+                       help=f'Headless results file: .jsonl, .csv or .parquet (default: {HEADLESS_RESULTS_PATH})')
     
     args = parser.parse_args()
     
@@ -441,9 +901,16 @@ Examples:
         system = VehicleCollisionDetectionSystem(
             input_source=input_source,
             input_type=args.type,
-            multi_view=args.multi_view
+            multi_view=args.multi_view,
+            multi_process=(args.workers or MULTI_PROCESS_VIEWS) and not args.headless,
+            pipeline=args.pipeline or PIPELINE_MODE,
+            headless=args.headless,
+            detection_cache=args.cache or DETECTION_CACHE_ENABLED
         )
-        system.run()
+        if args.headless:
+            system.run_headless(args.results)
+        else:
+            system.run()
     except KeyboardInterrupt:
         print("\nInterrupted by user")
     except Exception as e:
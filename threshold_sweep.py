@@ -0,0 +1,222 @@
+"""
+Threshold sweep: record tracker output once, then score a grid of collision thresholds
+"""
+
+import argparse
+import itertools
+import time
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from collision_detector import CollisionDetector, SEVERITIES, THRESHOLD_NAMES, default_thresholds
+
+
+class TrackRecorder:
+    """Headless-mode writer collecting analyzed track samples into an .npz recording"""
+
+    def __init__(self, path, frame_sizes):
+        """
+        Args:
+            path: Output .npz file
+            frame_sizes: Dict with view names as keys and (width, height) as values
+        """
+        self.path = path
+        self.frame_sizes = frame_sizes
+        self.views = list(frame_sizes.keys())
+        self.rows = []
+
+    def write_frame(self, frame_number, timestamp, vehicles_info, alert_severity=None,
+                    alert_messages=None):
+        """Record the threshold-independent part of every analyzed vehicle"""
+        for vehicle in vehicles_info:
+            x, y = vehicle['position']
+            vx, vy = vehicle['velocity']
+            self.rows.append((frame_number, self.views.index(vehicle['view']), vehicle['id'],
+                              x, y, vx, vy, vehicle['speed'], vehicle['distance'], vehicle['angle']))
+
+    def close(self):
+        """Write the recording"""
+        rows = np.array(self.rows, dtype=np.float64).reshape(-1, 10)
+        np.savez_compressed(
+            self.path,
+            frame=rows[:, 0].astype(np.int64),
+            view=rows[:, 1].astype(np.int16),
+            id=rows[:, 2].astype(np.int64),
+            position=rows[:, 3:5],
+            velocity=rows[:, 5:7],
+            speed=rows[:, 7],
+            distance=rows[:, 8],
+            angle=rows[:, 9],
+            views=np.array(self.views),
+            frame_sizes=np.array([self.frame_sizes[view] for view in self.views], dtype=np.int64)
+        )
+        print(f"Recorded {len(rows)} track samples to {self.path}")
+
+
+def load_recording(path):
+    """Load a recording written by TrackRecorder"""
+    with np.load(path) as data:
+        return {key: data[key] for key in data.files}
+
+
+# Recording shared by the tasks of a sweep worker process
+_recording = None
+
+
+def _init_worker(path):
+    global _recording
+    _recording = load_recording(path)
+
+
+def score_thresholds(recording, thresholds):
+    """
+    Replay collision prediction over a recording with one threshold configuration
+
+    Returns:
+        Dict with alert counts and the severity distribution
+    """
+    severity_counts = np.zeros(len(SEVERITIES), dtype=np.int64)
+    alert_frames = set()
+    alert_tracks = set()
+
+    for code, view in enumerate(recording['views']):
+        rows = recording['view'] == code
+        if not rows.any():
+            continue
+        width, height = recording['frame_sizes'][code]
+        detector = CollisionDetector(int(width), int(height), thresholds)
+        is_collision, _, severity = detector.predict_collisions(
+            recording['position'][rows], recording['velocity'][rows], recording['speed'][rows],
+            recording['distance'][rows], recording['angle'][rows], str(view))
+
+        severity_counts += np.bincount(severity, minlength=len(SEVERITIES))
+        alert_frames.update(np.unique(recording['frame'][rows][is_collision]).tolist())
+        alert_tracks.update((code, i) for i in np.unique(recording['id'][rows][is_collision]).tolist())
+
+    result = dict(thresholds)
+    result['alerts'] = int(severity_counts[1:].sum())
+    result['alert_frames'] = len(alert_frames)
+    result['alert_tracks'] = len(alert_tracks)
+    for name, count in zip(SEVERITIES, severity_counts):
+        result[name] = int(count)
+    return result
+
+
+def _score_chunk(configs):
+    return [score_thresholds(_recording, thresholds) for thresholds in configs]
+
+
+def build_grid(grid_args):
+    """
+    Build threshold configurations from NAME=v1,v2,... arguments
+
+    Returns:
+        List of threshold dicts (config.py values for names not in the grid)
+    """
+    axes = []
+    for arg in grid_args:
+        name, _, values = arg.partition('=')
+        name = name.strip().upper()
+        if name not in THRESHOLD_NAMES:
+            raise ValueError(f"Unknown threshold {name}, choose from: {', '.join(THRESHOLD_NAMES)}")
+        axes.append((name, [float(v) for v in values.split(',') if v.strip()]))
+
+    base = default_thresholds()
+    configs = []
+    for combination in itertools.product(*(values for _, values in axes)):
+        thresholds = dict(base)
+        thresholds.update(zip((name for name, _ in axes), combination))
+        configs.append(thresholds)
+    return configs
+
+
+def run_sweep(recording_path, configs, workers=None, chunk_size=16):
+    """
+    Score all configurations in parallel
+
+    Args:
+        recording_path: Recording written by TrackRecorder
+        configs: List of threshold dicts
+        workers: Worker processes (None = CPU count)
+        chunk_size: Configurations per task
+
+    Returns:
+        List of result dicts in configuration order
+    """
+    chunks = [configs[i:i + chunk_size] for i in range(0, len(configs), chunk_size)]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(recording_path,)) as executor:
+        return [result for chunk in executor.map(_score_chunk, chunks) for result in chunk]
+
+
+def record(args):
+    """Run detection and tracking once and record the tracker output"""
+    from run_detection import VehicleCollisionDetectionSystem
+
+    system = VehicleCollisionDetectionSystem(input_source=args.input, multi_view=args.multi_view,
+                                             multi_process=False, headless=True,
+                                             detection_cache=args.cache)
+    system.run_headless(args.output, writer=TrackRecorder(args.output, system.frame_sizes))
+
+
+def sweep(args):
+    """Score a grid of thresholds over a recording and report alert statistics"""
+    import pandas as pd
+
+    configs = build_grid(args.grid)
+    recording = load_recording(args.recording)
+    print(f"Scoring {len(configs)} threshold configurations over "
+          f"{len(recording['frame'])} track samples...")
+
+    start = time.perf_counter()
+    results = run_sweep(args.recording, configs, args.workers)
+    elapsed = time.perf_counter() - start
+
+    df = pd.DataFrame(results)
+    swept = [arg.partition('=')[0].strip().upper() for arg in args.grid]
+    columns = swept + ['alerts', 'alert_frames', 'alert_tracks'] + SEVERITIES[1:]
+    print(df[columns].to_string(index=False))
+    print(f"\nScored {len(configs)} configurations in {elapsed:.2f}s")
+
+    if args.output:
+        df.to_csv(args.output, index=False)
+        print(f"Results written to {args.output}")
+
+
+def main():
+    """Main entry point with command-line arguments"""
+    parser = argparse.ArgumentParser(
+        description='Collision threshold sweep over recorded tracks',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Record tracker output once
+  python threshold_sweep.py record --input DEMO2.mp4 --output tracks.npz
+
+  # Score a grid of thresholds
+  python threshold_sweep.py sweep tracks.npz --grid CRITICAL_DISTANCE=3,5,7 --grid HIGH_SPEED=10,15,20
+        """
+    )
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    record_parser = subparsers.add_parser('record', help='Record tracker output of an input')
+    record_parser.add_argument('--input', '-i', default=None, help='Video file (default: from config)')
+    record_parser.add_argument('--multi-view', '-m', action='store_true', help='Record all config views')
+    record_parser.add_argument('--cache', action='store_true', help='Use the detection cache')
+    record_parser.add_argument('--output', '-o', default='tracks.npz', help='Recording output path')
+    record_parser.set_defaults(func=record)
+
+    sweep_parser = subparsers.add_parser('sweep', help='Score threshold configurations')
+    sweep_parser.add_argument('recording', help='Recording written by the record command')
+    sweep_parser.add_argument('--grid', '-g', action='append', required=True,
+                              help='Threshold values as NAME=v1,v2,... (repeat for more thresholds)')
+    sweep_parser.add_argument('--workers', '-w', type=int, default=None,
+                              help='Worker processes (default: CPU count)')
+    sweep_parser.add_argument('--output', '-o', default=None, help='Write all results to a CSV file')
+    sweep_parser.set_defaults(func=sweep)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
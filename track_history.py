@@ -0,0 +1,150 @@
+"""
+Fixed-size ring buffers of recent positions, timestamps and speeds for all tracks
+"""
+
+import numpy as np
+
+
+class TrackHistory:
+    """
+    Recent history of many tracks stored as rows of preallocated ring buffers
+
+    Rows are managed like BatchKalmanFilter rows (dense, removal moves the last
+    row into the freed one), so the same row index addresses a track in both.
+    Appending overwrites the oldest entry once a buffer is full and the average
+    speed is kept as a running sum (recomputed from the ring each time it wraps, so
+    rounding errors cannot accumulate), so no per-frame work depends on history length.
+    """
+
+    def __init__(self, capacity=64, max_positions=30, max_speeds=10):
+        """
+        Initialize the buffers
+
+        Args:
+            capacity: Initial number of rows allocated (grows as needed)
+            max_positions: Positions and timestamps kept per track
+            max_speeds: Speed samples kept per track (for the average speed)
+        """
+        self.max_positions = max_positions
+        self.max_speeds = max_speeds
+        self.count = 0
+        self._allocate(capacity)
+
+    def _allocate(self, capacity):
+        self.positions = np.zeros((capacity, self.max_positions, 2))
+        self.timestamps = np.zeros((capacity, self.max_positions))
+        self.position_start = np.zeros(capacity, dtype=np.int64)  # Slot of the oldest position
+        self.position_count = np.zeros(capacity, dtype=np.int64)
+        self.speeds = np.zeros((capacity, self.max_speeds))
+        self.speed_start = np.zeros(capacity, dtype=np.int64)
+        self.speed_count = np.zeros(capacity, dtype=np.int64)
+        self.speed_sum = np.zeros(capacity)
+
+    def _arrays(self):
+        return ('positions', 'timestamps', 'position_start', 'position_count',
+                'speeds', 'speed_start', 'speed_count', 'speed_sum')
+
+    def _grow(self):
+        old = {name: getattr(self, name) for name in self._arrays()}
+        self._allocate(max(1, len(self.positions)) * 2)
+        for name, array in old.items():
+            getattr(self, name)[:self.count] = array[:self.count]
+
+    def add(self, cx, cy, timestamp):
+        """
+        Add a track first seen at (cx, cy), with a speed sample of 0
+
+        Returns:
+            Row index of the new track
+        """
+        if self.count == len(self.positions):
+            self._grow()
+        row = self.count
+        self.positions[row, 0] = (cx, cy)
+        self.timestamps[row, 0] = timestamp
+        self.position_start[row] = 0
+        self.position_count[row] = 1
+        self.speeds[row, 0] = 0.0
+        self.speed_start[row] = 0
+        self.speed_count[row] = 1
+        self.speed_sum[row] = 0.0
+        self.count += 1
+        return row
+
+    def remove(self, row):
+        """
+        Remove a track, compacting the buffers by moving the last row into its place
+
+        Returns:
+            Former index of the row moved into `row`, or None if the last row was removed
+        """
+        last = self.count - 1
+        self.count -= 1
+        if row == last:
+            return None
+        for name in self._arrays():
+            array = getattr(self, name)
+            array[row] = array[last]
+        return last
+
+    def append_positions(self, rows, positions, timestamp):
+        """
+        Record a position for each of the given tracks, dropping their oldest one if full
+
+        Args:
+            rows: Distinct row indices
+            positions: (len(rows), 2) array of (cx, cy)
+            timestamp: Time of the positions
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        count = self.position_count[rows]
+        slots = (self.position_start[rows] + count) % self.max_positions
+        self.positions[rows, slots] = positions
+        self.timestamps[rows, slots] = timestamp
+        full = count == self.max_positions
+        self.position_count[rows] = np.minimum(count + 1, self.max_positions)
+        self.position_start[rows] = (self.position_start[rows] + full) % self.max_positions
+
+    def append_speeds(self, rows, speeds):
+        """
+        Record a speed sample for each of the given tracks, dropping their oldest one if full
+
+        Args:
+            rows: Distinct row indices
+            speeds: Speed of each track
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        count = self.speed_count[rows]
+        slots = (self.speed_start[rows] + count) % self.max_speeds
+        full = count == self.max_speeds
+        # A full buffer's next slot holds its oldest sample, which drops out of the sum
+        self.speed_sum[rows] += speeds - np.where(full, self.speeds[rows, slots], 0.0)
+        self.speeds[rows, slots] = speeds
+        self.speed_count[rows] = np.minimum(count + 1, self.max_speeds)
+        self.speed_start[rows] = (self.speed_start[rows] + full) % self.max_speeds
+
+        # Resync the running sums that drifted over a full turn of their ring
+        wrapped = rows[full & (self.speed_start[rows] == 0)]
+        if len(wrapped):
+            self.speed_sum[wrapped] = self.speeds[wrapped].sum(axis=1)
+
+    def last_positions(self, rows):
+        """
+        Get the most recent position of each of the given tracks
+
+        Returns:
+            ((len(rows), 2) positions, (len(rows),) timestamps)
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        slots = (self.position_start[rows] + self.position_count[rows] - 1) % self.max_positions
+        return self.positions[rows, slots], self.timestamps[rows, slots]
+
+    def average_speed(self, row):
+        """Mean of the recorded speed samples of a track (0 if there are none)"""
+        count = self.speed_count[row]
+        return self.speed_sum[row] / count if count else 0.0
+
+    def trajectory(self, row):
+        """Get the recorded positions of a track, oldest first, as an (N, 2) array"""
+        slots = (self.position_start[row] + np.arange(self.position_count[row])) % self.max_positions
+        return self.positions[row, slots]
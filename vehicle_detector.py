@@ -0,0 +1,241 @@
+"""
+Vehicle detector backends (PyTorch YOLOv8 and ONNX Runtime)
+"""
+
+import ast
+import os
+import cv2
+import numpy as np
+from config import (CONFIDENCE_THRESHOLD, IOU_THRESHOLD, VEHICLE_CLASSES,
+                    DETECTOR_BACKEND, MODEL_PATH, ONNX_MODEL_PATH, ONNX_INT8_MODEL_PATH,
+                    ONNX_PROVIDERS, DETECTOR_INPUT_SIZE)
+from detection_decoder import decode_result, decode_boxes
+from detection_cache import file_content_hash
+
+
+def letterbox(frame, size=DETECTOR_INPUT_SIZE):
+    """
+    Letterbox a BGR frame into a square network input blob
+
+    Returns:
+        (blob, gain, (pad_x, pad_y)) where blob is a (1, 3, size, size) float32 RGB array
+    """
+    h, w = frame.shape[:2]
+    gain = min(size / h, size / w)
+    new_w, new_h = int(round(w * gain)), int(round(h * gain))
+    pad_x = (size - new_w) / 2
+    pad_y = (size - new_h) / 2
+
+    resized = cv2.resize(frame, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+    top, left = int(round(pad_y - 0.1)), int(round(pad_x - 0.1))
+    canvas = np.full((size, size, 3), 114, dtype=np.uint8)
+    canvas[top:top + new_h, left:left + new_w] = resized
+
+    blob = cv2.cvtColor(canvas, cv2.COLOR_BGR2RGB).transpose(2, 0, 1)
+    blob = np.ascontiguousarray(blob, dtype=np.float32)[None] / 255.0
+    return blob, gain, (left, top)
+
+
+class VehicleDetector:
+    """Base class for detector backends returning decoded vehicle detections"""
+
+    def __init__(self, conf=CONFIDENCE_THRESHOLD, iou=IOU_THRESHOLD, classes=VEHICLE_CLASSES):
+        """
+        Initialize common detector settings
+
+        Args:
+            conf: Confidence threshold
+            iou: NMS IoU threshold
+            classes: Class indices to detect (None for all COCO classes)
+        """
+        self.conf = conf
+        self.iou = iou
+        self.classes = list(classes) if classes is not None else None
+        self.names = {}
+
+    def detect(self, frame):
+        """
+        Detect vehicles in a frame
+
+        Returns:
+            (N, 6) float32 array with rows (x, y, w, h, conf, cls)
+        """
+        raise NotImplementedError
+
+    def detect_batch(self, frames):
+        """
+        Detect vehicles in several frames
+
+        Args:
+            frames: List of frames
+
+        Returns:
+            List of (N, 6) detection arrays in input order
+        """
+        return [self.detect(frame) for frame in frames]
+
+    def get_settings(self):
+        """Settings that determine the detector output (e.g. to key cached detections)"""
+        model_path = getattr(self, 'model_path', None)
+        return {
+            'detector': type(self).__name__,
+            'model': os.path.basename(model_path) if model_path else None,
+            # Weights content, so retrained weights under the same name give different settings
+            'model_hash': file_content_hash(model_path) if model_path and os.path.isfile(model_path) else None,
+            'input_size': getattr(self, 'input_size', None),
+            'conf': self.conf,
+            'iou': self.iou,
+            'classes': self.classes
+        }
+
+    def _decode_classes(self):
+        """Classes to keep when decoding (all model classes if unfiltered)"""
+        return self.classes if self.classes is not None else list(self.names.keys())
+
+
+class TorchDetector(VehicleDetector):
+    """YOLOv8 on PyTorch via ultralytics"""
+
+    def __init__(self, model_path=MODEL_PATH, **kwargs):
+        super().__init__(**kwargs)
+        from ultralytics import YOLO
+
+        self.model = YOLO(model_path)
+        self.model_path = model_path
+        self.names = self.model.names
+
+    def _predict(self, source):
+        """Run the model with the class filter applied before NMS"""
+        # Passing classes lets YOLO drop non-vehicle candidates before box decoding and NMS
+        return self.model(source, conf=self.conf, iou=self.iou,
+                          classes=self.classes, verbose=False)
+
+    def detect(self, frame):
+        results = self._predict(frame)
+        return decode_result(results[0], self._decode_classes())
+
+    def detect_batch(self, frames):
+        """Detect vehicles in several frames with a single model call"""
+        if not frames:
+            return []
+        results = self._predict(list(frames))
+        return [decode_result(result, self._decode_classes()) for result in results]
+
+
+class OnnxDetector(VehicleDetector):
+    """YOLOv8 exported to ONNX and run on ONNX Runtime (CPU, or OpenVINO via providers)"""
+
+    def __init__(self, model_path=ONNX_MODEL_PATH, providers=ONNX_PROVIDERS,
+                 input_size=DETECTOR_INPUT_SIZE, **kwargs):
+        super().__init__(**kwargs)
+        try:
+            import onnxruntime as ort
+        except ImportError:
+            raise ImportError("onnxruntime is required for the ONNX backend: pip install onnxruntime")
+
+        if not os.path.isfile(model_path):
+            raise FileNotFoundError(f"ONNX model not found: {model_path} "
+                                    f"(create it with export_onnx_model() or quantize_model.py)")
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        available = ort.get_available_providers()
+        providers = [p for p in providers if p in available] or ['CPUExecutionProvider']
+
+        self.session = ort.InferenceSession(model_path, sess_options=options, providers=providers)
+        self.model_path = model_path
+        self.input_name = self.session.get_inputs()[0].name
+        self.input_size = input_size
+        self.names = self._read_names()
+
+    def _read_names(self):
+        """Read class names from the metadata written by the ultralytics exporter"""
+        metadata = self.session.get_modelmeta().custom_metadata_map
+        try:
+            return ast.literal_eval(metadata['names'])
+        except (KeyError, ValueError, SyntaxError):
+            return {i: f"Class_{i}" for i in range(80)}
+
+    def _preprocess(self, frame):
+        return letterbox(frame, self.input_size)
+
+    def _postprocess(self, output, frame_shape, gain, pad):
+        """Decode raw (84, N) network output into vehicle detections"""
+        predictions = output.T  # (N, 4 + num_classes)
+        scores = predictions[:, 4:]
+
+        # Only score the requested classes, before thresholding and NMS
+        class_ids = np.arange(scores.shape[1])
+        if self.classes is not None:
+            class_ids = np.asarray(self.classes)
+            scores = scores[:, class_ids]
+
+        best = scores.argmax(axis=1)
+        conf = scores[np.arange(len(scores)), best]
+        keep = conf >= self.conf
+        if not keep.any():
+            return np.empty((0, 6), dtype=np.float32)
+
+        boxes = predictions[keep, :4]
+        conf = conf[keep]
+        cls = class_ids[best[keep]]
+
+        # cxcywh in network space -> xyxy in frame space
+        xyxy = np.empty_like(boxes)
+        xyxy[:, 0] = boxes[:, 0] - boxes[:, 2] / 2
+        xyxy[:, 1] = boxes[:, 1] - boxes[:, 3] / 2
+        xyxy[:, 2] = boxes[:, 0] + boxes[:, 2] / 2
+        xyxy[:, 3] = boxes[:, 1] + boxes[:, 3] / 2
+        xyxy[:, [0, 2]] -= pad[0]
+        xyxy[:, [1, 3]] -= pad[1]
+        xyxy /= gain
+        h, w = frame_shape[:2]
+        xyxy[:, [0, 2]] = xyxy[:, [0, 2]].clip(0, w)
+        xyxy[:, [1, 3]] = xyxy[:, [1, 3]].clip(0, h)
+
+        # Class-aware NMS
+        xywh = np.column_stack([xyxy[:, :2], xyxy[:, 2:] - xyxy[:, :2]])
+        indices = cv2.dnn.NMSBoxesBatched(xywh.tolist(), conf.tolist(), cls.tolist(),
+                                          self.conf, self.iou)
+        indices = np.asarray(indices, dtype=np.int64).reshape(-1)
+
+        return decode_boxes(xyxy[indices], conf[indices], cls[indices], self._decode_classes())
+
+    def detect(self, frame):
+        blob, gain, pad = self._preprocess(frame)
+        output = self.session.run(None, {self.input_name: blob})[0]
+        return self._postprocess(output[0], frame.shape, gain, pad)
+
+
+def export_onnx_model(model_path=MODEL_PATH, input_size=DETECTOR_INPUT_SIZE):
+    """
+    Export YOLOv8 weights to ONNX
+
+    Returns:
+        Path to the exported ONNX file
+    """
+    from ultralytics import YOLO
+
+    return YOLO(model_path).export(format='onnx', imgsz=input_size, simplify=True)
+
+
+def create_detector(backend=DETECTOR_BACKEND, **kwargs):
+    """
+    Create a detector backend
+
+    Args:
+        backend: 'pytorch', 'onnx' or 'onnx-int8'
+        **kwargs: Passed to the backend (conf, iou, classes, model_path, ...)
+
+    Returns:
+        VehicleDetector instance
+    """
+    if backend == 'pytorch':
+        return TorchDetector(**kwargs)
+    elif backend == 'onnx':
+        return OnnxDetector(**kwargs)
+    elif backend == 'onnx-int8':
+        kwargs.setdefault('model_path', ONNX_INT8_MODEL_PATH)
+        return OnnxDetector(**kwargs)
+    else:
+        raise ValueError(f"Unknown detector backend: {backend}")
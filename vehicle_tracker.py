@@ -3,63 +3,55 @@ Vehicle tracking module using Kalman filter for speed estimation
 """
 
 import numpy as np
-from filterpy.kalman import KalmanFilter
-from collections import defaultdict
 import time
+from scipy.optimize import linear_sum_assignment
+from batch_kalman import BatchKalmanFilter
+from track_history import TrackHistory
+
+# Assignment cost of detection/track pairs beyond the matching distance
+GATED_COST = 1e9
 
 
 class VehicleTracker:
     """Tracks vehicles and estimates their speed, position, and trajectory"""
     
-    def __init__(self, max_disappeared=30):
+    def __init__(self, max_disappeared=30, max_distance=100):
+        """
+        Args:
+            max_disappeared: Frames a track may go unmatched before it is removed
+            max_distance: Maximum distance (pixels) between a detection and a predicted track to match
+        """
         self.next_id = 0
-        self.trackers = {}
+        self.max_distance = max_distance
+        # Track table: row i of self.kf and self.history is track self.row_ids[i], and
+        # column i of the association cost matrix, so matched/unmatched indices are rows
+        self.kf = BatchKalmanFilter()  # Kalman state of all tracks, one row per track
+        self.history = TrackHistory()  # Recent positions, timestamps and speeds, same rows
+        self.trackers = {}  # object_id -> row in self.kf
+        self.row_ids = []   # row in self.kf -> object_id
         self.disappeared = {}
         self.max_disappeared = max_disappeared
-        self.speeds = defaultdict(list)
-        self.positions_history = defaultdict(list)
-        self.timestamps = defaultdict(list)
         self.bboxes = {}  # Store last known bbox for each tracked vehicle
         
-    def _create_kalman_filter(self):
-        """Create a Kalman filter for vehicle tracking"""
-        kf = KalmanFilter(dim_x=4, dim_z=2)
-        
-        # State: [x, y, vx, vy] (position and velocity)
-        kf.F = np.array([[1, 0, 1, 0],    # State transition
-                         [0, 1, 0, 1],
-                         [0, 0, 1, 0],
-                         [0, 0, 0, 1]], dtype=np.float32)
-        
-        kf.H = np.array([[1, 0, 0, 0],    # Measurement function
-                         [0, 1, 0, 0]], dtype=np.float32)
-        
-        kf.P *= 1000.  # Covariance matrix
-        kf.R = np.array([[5, 0],          # Measurement noise
-                         [0, 5]], dtype=np.float32)
-        kf.Q = np.array([[1, 0, 0, 0],    # Process noise
-                         [0, 1, 0, 0],
-                         [0, 0, 1, 0],
-                         [0, 0, 0, 1]], dtype=np.float32) * 0.03
-        
-        return kf
-    
     def update(self, detections, frame_center):
         """
         Update trackers with new detections
         
+        One frame is one cycle: every track is predicted exactly once, detections
+        are associated with the predicted positions, then matched tracks are corrected.
+        
         Args:
             detections: List of (x, y, w, h) bounding boxes
             frame_center: (cx, cy) center of the frame
         """
         current_time = time.time()
         
+        # Predict all tracks one frame ahead
+        self.kf.predict()
+        
         # If no detections, mark all as disappeared
         if len(detections) == 0:
-            for object_id in list(self.disappeared.keys()):
-                self.disappeared[object_id] += 1
-                if self.disappeared[object_id] > self.max_disappeared:
-                    self._remove_tracker(object_id)
+            self._age_trackers(range(len(self.row_ids)))
             return
         
         # Match detections to existing trackers
@@ -73,142 +65,150 @@ class VehicleTracker:
                 detections, frame_center, current_time
             )
             
-            # Update matched trackers
-            for det_idx, trk_idx in matched:
-                self._update_tracker(trk_idx, detections[det_idx], frame_center, current_time)
+            # Correct matched trackers and extend their history (in one batch)
+            rows = [row for _, row in matched]
+            centers = np.array([self._center(detections[det_idx]) for det_idx, _ in matched],
+                               dtype=np.float64).reshape(-1, 2)
+            self.kf.update(rows, centers)
+            self._update_history(rows, centers, current_time)
+            for det_idx, row in matched:
+                self._update_tracker(row, detections[det_idx], frame_center, current_time)
             
             # Create new trackers for unmatched detections
             for det_idx in unmatched_dets:
                 self._create_tracker(detections[det_idx], frame_center, current_time)
             
             # Mark unmatched trackers as disappeared
-            for trk_idx in unmatched_trks:
-                object_id = list(self.trackers.keys())[trk_idx]
-                self.disappeared[object_id] += 1
-                if self.disappeared[object_id] > self.max_disappeared:
-                    self._remove_tracker(object_id)
+            self._age_trackers(unmatched_trks)
+    
+    def _age_trackers(self, rows):
+        """Count a missed frame for the tracks in the given rows and remove expired ones"""
+        expired = []
+        for row in rows:
+            object_id = self.row_ids[row]
+            self.disappeared[object_id] += 1
+            if self.disappeared[object_id] > self.max_disappeared:
+                expired.append(row)
+        
+        # Remove from the highest row down: removal moves the last row into the freed
+        # one, which is then never a row still waiting to be removed
+        for row in sorted(expired, reverse=True):
+            self._remove_tracker(self.row_ids[row])
+    
+    def predict(self, flow_bboxes=None):
+        """
+        Advance all tracks by one frame without detections
+        
+        Used on frames where the detector is not run. Stored bboxes follow the
+        predicted centers so downstream distance/angle estimates stay current.
+        
+        Args:
+            flow_bboxes: Optional dict of object_id -> (x, y, w, h) propagated by
+                         optical flow. These tracks are corrected with the flow-measured
+                         center and take the flow bbox, so their size follows the vehicle.
+        """
+        flow_bboxes = flow_bboxes or {}
+        self.kf.predict()
+        flow_ids = [object_id for object_id in flow_bboxes if object_id in self.trackers]
+        self.kf.update([self.trackers[object_id] for object_id in flow_ids],
+                       [self._center(flow_bboxes[object_id]) for object_id in flow_ids])
+        
+        for object_id, row in self.trackers.items():
+            if object_id in flow_bboxes:
+                self.bboxes[object_id] = flow_bboxes[object_id]
+            elif object_id in self.bboxes:
+                x, y, w, h = self.bboxes[object_id]
+                cx, cy = self.kf.x[row, 0], self.kf.x[row, 1]
+                self.bboxes[object_id] = (int(cx - w / 2), int(cy - h / 2), w, h)
+    
+    def get_active_bboxes(self):
+        """Get bboxes of tracks that are currently visible"""
+        return {object_id: bbox for object_id, bbox in self.bboxes.items()
+                if self.disappeared.get(object_id, 0) == 0}
+    
+    @staticmethod
+    def _center(bbox):
+        """Center (cx, cy) of an (x, y, w, h) bbox"""
+        x, y, w, h = bbox
+        return x + w / 2, y + h / 2
     
     def _create_tracker(self, detection, frame_center, current_time):
         """Create a new tracker for a detection"""
-        x, y, w, h = detection
-        cx = x + w / 2
-        cy = y + h / 2
-        
-        kf = self._create_kalman_filter()
-        kf.x = np.array([cx, cy, 0, 0], dtype=np.float32)
+        cx, cy = self._center(detection)
         
         object_id = self.next_id
         self.next_id += 1
         
-        self.trackers[object_id] = kf
+        self.trackers[object_id] = self.kf.add(cx, cy)
+        self.history.add(cx, cy, current_time)
+        self.row_ids.append(object_id)
         self.disappeared[object_id] = 0
-        self.positions_history[object_id] = [(cx, cy)]
-        self.timestamps[object_id] = [current_time]
-        self.speeds[object_id] = [0.0]
         self.bboxes[object_id] = detection
     
-    def _update_tracker(self, trk_idx, detection, frame_center, current_time):
-        """Update an existing tracker"""
-        object_id = list(self.trackers.keys())[trk_idx]
-        kf = self.trackers[object_id]
-        
-        x, y, w, h = detection
-        cx = x + w / 2
-        cy = y + h / 2
-        
-        # Update Kalman filter
-        kf.predict()
-        kf.update(np.array([cx, cy], dtype=np.float32))
+    def _update_history(self, rows, centers, current_time):
+        """Record the matched centers of the given rows and the speeds they imply"""
+        if len(rows) == 0:
+            return
         
         # Calculate speed
-        if len(self.positions_history[object_id]) > 0:
-            prev_x, prev_y = self.positions_history[object_id][-1]
-            prev_time = self.timestamps[object_id][-1]
-            
-            dt = current_time - prev_time
-            if dt > 0:
-                dx = cx - prev_x
-                dy = cy - prev_y
-                speed = np.sqrt(dx**2 + dy**2) / dt
-                self.speeds[object_id].append(speed)
-                
-                # Keep only recent speeds
-                if len(self.speeds[object_id]) > 10:
-                    self.speeds[object_id].pop(0)
-        
-        # Update history
-        self.positions_history[object_id].append((cx, cy))
-        self.timestamps[object_id].append(current_time)
+        prev_positions, prev_times = self.history.last_positions(rows)
+        dt = current_time - prev_times
+        moved = dt > 0
+        speeds = np.sqrt(((centers[moved] - prev_positions[moved])**2).sum(axis=1)) / dt[moved]
+        self.history.append_speeds(np.asarray(rows)[moved], speeds)
+        
+        # Update history (the ring buffers keep only the recent entries)
+        self.history.append_positions(rows, centers, current_time)
+    
+    def _update_tracker(self, row, detection, frame_center, current_time):
+        """Mark a matched tracker as seen (its Kalman correction and history are batched in update())"""
+        object_id = self.row_ids[row]
         self.disappeared[object_id] = 0
         self.bboxes[object_id] = detection
-        
-        # Keep only recent history
-        if len(self.positions_history[object_id]) > 30:
-            self.positions_history[object_id].pop(0)
-            self.timestamps[object_id].pop(0)
     
     def _associate_detections_to_trackers(self, detections, frame_center, current_time):
-        """Match detections to trackers using Hungarian algorithm (simplified)"""
+        """
+        Match detections to trackers with an optimal assignment (Hungarian algorithm)
+        
+        Returns:
+            (matched, unmatched_dets, unmatched_trks) with matched as (detection index, row)
+            pairs and unmatched_trks as rows of the track table
+        """
         if len(self.trackers) == 0:
             return [], list(range(len(detections))), []
         
-        # Calculate cost matrix (distance between detection and predicted position)
-        cost_matrix = []
-        for detection in detections:
-            x, y, w, h = detection
-            det_cx = x + w / 2
-            det_cy = y + h / 2
-            
-            row = []
-            for object_id, kf in self.trackers.items():
-                kf.predict()
-                pred_x, pred_y = kf.x[0], kf.x[1]
-                distance = np.sqrt((det_cx - pred_x)**2 + (det_cy - pred_y)**2)
-                row.append(distance)
-            cost_matrix.append(row)
-        
-        # Simple greedy matching (can be improved with Hungarian algorithm)
-        matched = []
-        unmatched_dets = list(range(len(detections)))
-        unmatched_trks = list(range(len(self.trackers)))
-        
-        if len(cost_matrix) > 0 and len(cost_matrix[0]) > 0:
-            # Find minimum cost matches
-            max_distance = 100  # Maximum distance for matching
-            
-            while True:
-                min_cost = float('inf')
-                min_det = -1
-                min_trk = -1
-                
-                for det_idx in unmatched_dets:
-                    for trk_idx in unmatched_trks:
-                        if cost_matrix[det_idx][trk_idx] < min_cost:
-                            min_cost = cost_matrix[det_idx][trk_idx]
-                            min_det = det_idx
-                            min_trk = trk_idx
-                
-                if min_cost < max_distance and min_det != -1:
-                    matched.append((min_det, min_trk))
-                    unmatched_dets.remove(min_det)
-                    unmatched_trks.remove(min_trk)
-                else:
-                    break
+        # Cost matrix: distance between each detection and each predicted position
+        # (tracks were already predicted for this frame in update()), one column per row
+        predicted = self.kf.positions()
+        centers = np.array([self._center(detection) for detection in detections], dtype=np.float64)
+        cost_matrix = np.sqrt(((centers[:, None, :] - predicted[None, :, :])**2).sum(axis=2))
+        
+        # Pairs too far apart may not match: a prohibitive cost makes the solver
+        # maximize the number of valid matches first, then minimize their distance
+        gated = cost_matrix >= self.max_distance
+        det_indices, trk_indices = linear_sum_assignment(np.where(gated, GATED_COST, cost_matrix))
+        valid = ~gated[det_indices, trk_indices]
+        det_indices, trk_indices = det_indices[valid], trk_indices[valid]
+        
+        matched = list(zip(det_indices.tolist(), trk_indices.tolist()))
+        unmatched_dets = np.setdiff1d(np.arange(len(detections)), det_indices).tolist()
+        unmatched_trks = np.setdiff1d(np.arange(len(self.row_ids)), trk_indices).tolist()
         
         return matched, unmatched_dets, unmatched_trks
     
     def _remove_tracker(self, object_id):
         """Remove a tracker"""
         if object_id in self.trackers:
-            del self.trackers[object_id]
+            row = self.trackers.pop(object_id)
+            moved = self.kf.remove(row)
+            self.history.remove(row)
+            # The last row was moved into the freed row
+            last_id = self.row_ids.pop()
+            if moved is not None:
+                self.row_ids[row] = last_id
+                self.trackers[last_id] = row
         if object_id in self.disappeared:
             del self.disappeared[object_id]
-        if object_id in self.speeds:
-            del self.speeds[object_id]
-        if object_id in self.positions_history:
-            del self.positions_history[object_id]
-        if object_id in self.timestamps:
-            del self.timestamps[object_id]
         if object_id in self.bboxes:
             del self.bboxes[object_id]
     
@@ -216,18 +216,17 @@ class VehicleTracker:
         """Get current tracked vehicles with their properties"""
         vehicles = []
         
-        for object_id, kf in self.trackers.items():
+        for object_id, row in self.trackers.items():
             if object_id in self.disappeared and self.disappeared[object_id] > 0:
                 continue
             
-            x, y = kf.x[0], kf.x[1]
-            vx, vy = kf.x[2], kf.x[3]
+            x, y, vx, vy = self.kf.x[row]
             
             # Get average speed
-            avg_speed = np.mean(self.speeds[object_id]) if self.speeds[object_id] else 0.0
+            avg_speed = self.history.average_speed(row)
             
-            # Get trajectory
-            trajectory = self.positions_history[object_id] if object_id in self.positions_history else []
+            # Get trajectory ((N, 2) array, oldest position first)
+            trajectory = self.history.trajectory(row)
             
             # Get bbox (use stored bbox or estimate from position)
             if object_id in self.bboxes:
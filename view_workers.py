@@ -0,0 +1,195 @@
+"""
+Process-per-view workers for multi-camera processing
+"""
+
+import multiprocessing as mp
+import queue
+import cv2
+from config import (WORKER_SEND_FRAMES, WORKER_FRAME_SCALE, WORKER_QUEUE_SIZE,
+                    SHARED_MEMORY_FRAMES, FRAME_RING_SLOTS)
+from frame_ring import SharedFrameRing, SharedFrameReader, capture_producer
+
+
+def _put(result_queue, item, stop_event):
+    """Put a result, blocking while the parent catches up but honouring stop requests"""
+    while not stop_event.is_set():
+        try:
+            result_queue.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _view_worker(view, source, result_queue, stop_event, send_frames, frame_scale,
+                 ring=None, properties=None):
+    """
+    Run decode -> detect -> track -> analyze -> draw for one view
+
+    Sends (ret, frame, vehicles_info) tuples back to the parent, where frame is the
+    annotated frame downscaled by frame_scale (or None when frames are not sent).
+    With a ring, frames are read from the view's capture process instead of decoded here.
+    """
+    # Imported here so the parent process does not import the system module twice
+    from run_detection import VehicleCollisionDetectionSystem
+
+    try:
+        reader = SharedFrameReader(ring, properties) if ring is not None else None
+        system = VehicleCollisionDetectionSystem(input_source=source, view_name=view,
+                                                 sound_enabled=False, input_handler=reader)
+        handler = system.input_handler
+
+        while not stop_event.is_set():
+            ret, frame = handler.read()
+            if not ret or frame is None:
+                if handler.is_finished() or handler.is_image:
+                    break
+                continue
+
+            processed_frame, vehicles_info = system._process_view(frame, view)
+            processed_frame = system.alert_system.draw_alert_overlay(processed_frame, vehicles_info)
+
+            small_frame = None
+            if send_frames:
+                small_frame = cv2.resize(processed_frame, None, fx=frame_scale, fy=frame_scale,
+                                         interpolation=cv2.INTER_AREA)
+            if not _put(result_queue, (True, small_frame, vehicles_info), stop_event):
+                break
+
+        system.cleanup()
+    except Exception as e:
+        print(f"Error in {view} worker: {e}")
+    finally:
+        # End-of-stream marker
+        _put(result_queue, (False, None, []), stop_event)
+
+
+class ViewWorkerPool:
+    """Runs each view's processing chain in its own worker process"""
+
+    def __init__(self, sources, send_frames=WORKER_SEND_FRAMES, frame_scale=WORKER_FRAME_SCALE,
+                 queue_size=WORKER_QUEUE_SIZE, shared_memory=SHARED_MEMORY_FRAMES,
+                 ring_slots=FRAME_RING_SLOTS):
+        """
+        Initialize the worker pool
+
+        Args:
+            sources: Dict with view names as keys and input sources as values
+            send_frames: Send annotated, downscaled frames back for display
+            frame_scale: Downscale factor for frames sent to the parent
+            queue_size: Results buffered per view before a worker blocks
+            shared_memory: Decode in a separate capture process per view and pass frames
+                           to the worker through a shared-memory ring
+            ring_slots: Frame slots per view ring
+        """
+        self.sources = {view: source for view, source in sources.items() if source is not None}
+        self.views = list(self.sources.keys())
+        self.send_frames = send_frames
+        self.frame_scale = frame_scale
+        self.queue_size = queue_size
+        self.shared_memory = shared_memory
+        self.ring_slots = ring_slots
+        self.context = mp.get_context('spawn')
+        self.stop_event = self.context.Event()
+        self.queues = {}
+        self.processes = {}
+        self.capture_processes = {}
+        self.rings = {}
+        self.finished = set()
+
+    def _start_capture(self, view, source):
+        """Start the capture process of a view and return (ring, input properties)"""
+        from input_handler import InputHandler
+
+        # Probe the input once so the ring slots match the frame size
+        probe = InputHandler(source, prefetch=False)
+        width, height = probe.get_frame_size()
+        properties = probe.get_properties()
+        probe.release()
+
+        ring = SharedFrameRing((height, width, 3), slots=self.ring_slots, context=self.context)
+        process = self.context.Process(
+            target=capture_producer,
+            args=(source, ring, self.stop_event),
+            name=f"capture-{view}",
+            daemon=True
+        )
+        process.start()
+        self.rings[view] = ring
+        self.capture_processes[view] = process
+        print(f"Started {view} capture (pid {process.pid}, {self.ring_slots} shared frame slots)")
+        return ring, properties
+
+    def start(self):
+        """Start one worker process per view"""
+        for view, source in self.sources.items():
+            ring, properties = None, None
+            if self.shared_memory:
+                ring, properties = self._start_capture(view, source)
+            self.queues[view] = self.context.Queue(maxsize=self.queue_size)
+            process = self.context.Process(
+                target=_view_worker,
+                args=(view, source, self.queues[view], self.stop_event,
+                      self.send_frames, self.frame_scale, ring, properties),
+                name=f"view-{view}",
+                daemon=True
+            )
+            process.start()
+            self.processes[view] = process
+            print(f"Started {view} worker (pid {process.pid})")
+
+    def read_all(self):
+        """
+        Collect the next result from every running view
+
+        Returns:
+            Dict with view names as keys and (ret, frame, vehicles_info) tuples as values
+        """
+        results = {}
+        for view in self.views:
+            if view in self.finished:
+                results[view] = (False, None, [])
+                continue
+
+            while True:
+                try:
+                    result = self.queues[view].get(timeout=0.1)
+                    break
+                except queue.Empty:
+                    if not self.processes[view].is_alive():
+                        result = (False, None, [])
+                        break
+
+            if not result[0]:
+                self.finished.add(view)
+            results[view] = result
+        return results
+
+    def all_finished(self):
+        """Check whether every worker has reached the end of its input"""
+        return len(self.finished) == len(self.views)
+
+    def stop(self):
+        """Stop all workers and release their queues"""
+        self.stop_event.set()
+        for view, process in self.processes.items():
+            # Drain so a worker blocked on a full queue can exit
+            try:
+                while True:
+                    self.queues[view].get_nowait()
+            except queue.Empty:
+                pass
+            process.join(timeout=5.0)
+            if process.is_alive():
+                process.terminate()
+        self.processes = {}
+
+        for process in self.capture_processes.values():
+            process.join(timeout=5.0)
+            if process.is_alive():
+                process.terminate()
+        self.capture_processes = {}
+        # Free the shared memory once no process is attached anymore
+        for ring in self.rings.values():
+            ring.close()
+        self.rings = {}